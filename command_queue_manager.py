@@ -175,7 +175,7 @@ class CommandQueueManager:
         
         # 检查是否为巡线指令
         elif cmd in ["start_linetrack", "stop_linetrack", "linetrack_status"]:
-            return self.tello_controller.execute_linetrack_command(command)
+            return self.tello_controller.execute_linetrack_command(cmd)
         
         # 检查是否为LED扩展指令
         elif cmd in ["led_color", "led_rgb", "led_breath", "led_blink", "display_text"]:
@@ -194,7 +194,7 @@ class CommandQueueManager:
                 except Exception as e:
                     print(f"⚠ 摄像头方向设置警告: {e}")
             
-            return self.tello_controller.execute_vision_command(command)
+            return self.tello_controller.execute_vision_command(command, command_parts)
         
         # 基本飞行指令
         else:
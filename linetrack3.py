@@ -18,6 +18,7 @@ import traceback
 from collections import deque
 import atexit
 import locale
+from queued_logging import get_queued_logger, start_log_listener, stop_log_listener
 
 # 检测系统默认编码
 print(f"系统默认编码: {locale.getpreferredencoding()}")
@@ -31,6 +32,10 @@ print(f"当前工作目录: {ROOT}")
 if str(ROOT) not in sys.path:
     sys.path.append(str(ROOT))
 
+# 主循环状态日志 - 经队列交给监听线程写出，避免在控制循环中同步刷新stdout
+track_logger = get_queued_logger("linetrack3")
+STATUS_LOG_INTERVAL = 30  # 状态未变化时每隔多少帧输出一次
+
 # 全局变量
 frame_queue = queue.Queue(maxsize=10)
 result_queue = queue.Queue(maxsize=10)
@@ -79,13 +84,36 @@ PREFERRED_DIRECTION = 0      # 下视图像中向左为0度（无人机前进方
 DIRECTION_TOLERANCE = 35     # 方向匹配容忍度
 FORWARD_DIRECTION_BIAS = 2.5 # 前向方向评分加权
 
+# 急转弯状态机参数
+SHARP_TURN_YAW_DURATION = 1.0      # 急转弯原地偏航时长（秒）
+SHARP_TURN_FORWARD_DURATION = 0.5  # 急转弯后缓慢前进时长（秒）
+
 # 自动飞行控制参数
 AUTO_FLIGHT_TIME = 90    # 延长自动飞行时间
 AUTO_SAFETY_CHECK_INTERVAL = 1.0  
 
+# 调试窗口参数
+SHOW_GUI = True                  # 是否显示调试窗口
+VIGNETTE_PREVIEW_INTERVAL = 10   # 暗角校正对比窗口刷新间隔（帧）
+USE_OPENCL_VIZ = True            # 可视化绘制使用OpenCL(UMat)加速
+
+# 仅在OpenCL可用时启用UMat绘制路径
+OPENCL_VIZ_ENABLED = USE_OPENCL_VIZ and cv2.ocl.haveOpenCL()
+if OPENCL_VIZ_ENABLED:
+    cv2.ocl.setUseOpenCL(True)
+
+# 线程CPU亲和性参数（仅Linux生效）
+# 默认从当前进程可用核心中为各线程各分配一个物理核心（跳过超线程兄弟核），物理核心不足时不绑定；
+# 需要手动指定时填写，如 {"main": {2}, "reader": {1}, "telemetry": {3}}
+THREAD_CORES_OVERRIDE = {}
+THREAD_ROLES = ("main", "reader", "telemetry")  # 主控制/视觉循环、视频读取线程、遥测轮询线程
+MAIN_THREAD_NICE = -10        # 主线程优先级提升（需要CAP_SYS_NICE）
+
 # 全局实例
 tello = None
 vignette_corrector = None
+sharp_turn_state = None   # None / "YAWING" / "FORWARD"
+sharp_turn_until = 0.0
 position_history = deque(maxlen=HISTORY_LENGTH)
 direction_history = deque(maxlen=HISTORY_LENGTH)
 
@@ -160,14 +188,8 @@ class DownwardCoordinateSystem:
         Returns:
             yaw_control: 偏航控制值
         """
-        # 角度偏差计算
-        angle_error = line_angle - target_angle
-        
-        # 归一化到[-180, 180]
-        while angle_error > 180:
-            angle_error -= 360
-        while angle_error < -180:
-            angle_error += 360
+        # 角度偏差计算，取模归一化到[-180, 180)
+        angle_error = ((line_angle - target_angle + 180.0) % 360.0) - 180.0
         
         # 计算偏航控制
         yaw_control = angle_error * DIRECTION_SENSITIVITY * YAW_RESPONSE_FACTOR
@@ -202,7 +224,8 @@ class VignetteCorrector:
     def __init__(self, image_shape, vignette_strength=0.4):
         self.height, self.width = image_shape[:2]
         self.vignette_strength = vignette_strength
-        self.correction_mask = self._create_correction_mask()
+        self._shape = (self.height, self.width)
+        self._update_mask()
         print(f"暗角校正器初始化完成: {self.width}x{self.height}, 强度={vignette_strength}")
     
     def _create_correction_mask(self):
@@ -215,25 +238,33 @@ class VignetteCorrector:
         correction_mask = np.clip(correction_mask, 1.0, 2.0)
         return correction_mask.astype(np.float32)
     
+    def _update_mask(self):
+        """重建校正掩码，并缓存三通道用的定点掩码"""
+        self.correction_mask = self._create_correction_mask()
+        # Q7定点（x128）：掩码上限2.0时 255*256 仍在uint16范围内
+        self.mask_q7 = np.round(self.correction_mask * 128).astype(np.uint16)[:, :, None]
+    
     def correct_vignette(self, image):
         if image is None:
             return None
             
-        current_height, current_width = image.shape[:2]
-        if current_height != self.height or current_width != self.width:
-            self.height, self.width = current_height, current_width
-            self.correction_mask = self._create_correction_mask()
-            
-        image_float = image.astype(np.float32)
-        
-        if len(image.shape) == 3:
-            corrected = np.zeros_like(image_float)
-            for i in range(image.shape[2]):
-                corrected[:,:,i] = image_float[:,:,i] * self.correction_mask
-        else:
-            corrected = image_float * self.correction_mask
-        
-        corrected = np.clip(corrected, 0, 255)
+        if image.shape[:2] != self._shape:
+            self.height, self.width = image.shape[:2]
+            self._shape = (self.height, self.width)
+            self._update_mask()
+        
+        if image.ndim == 3:
+            # 彩色图：uint16定点乘法 + 右移，避免浮点中间结果
+            corrected = image.astype(np.uint16)
+            np.multiply(corrected, self.mask_q7, out=corrected)
+            np.right_shift(corrected, 7, out=corrected)
+            np.minimum(corrected, 255, out=corrected)
+            return corrected.astype(np.uint8)
+        
+        # 灰度图保留浮点路径
+        corrected = image.astype(np.float32)
+        np.multiply(corrected, self.correction_mask, out=corrected)
+        np.clip(corrected, 0, 255, out=corrected)
         return corrected.astype(np.uint8)
     
     def visualize_correction(self, original_image):
@@ -257,6 +288,98 @@ class VignetteCorrector:
         
         return comparison
 
+def _physical_cores(available):
+    """从可用逻辑核心中每个物理核心只取一个（按sysfs的thread_siblings_list去重）"""
+    chosen = []
+    seen_siblings = set()
+    for cpu in sorted(available):
+        try:
+            with open(f"/sys/devices/system/cpu/cpu{cpu}/topology/thread_siblings_list") as f:
+                siblings = f.read().strip()
+        except OSError:
+            siblings = str(cpu)
+        if siblings not in seen_siblings:
+            seen_siblings.add(siblings)
+            chosen.append(cpu)
+    return chosen
+
+def plan_thread_cores():
+    """
+    为THREAD_ROLES中的各线程分配核心
+    
+    Returns:
+        dict: 角色 -> 核心集合；不支持亲和性或物理核心少于角色数时为空字典（不绑定）
+    """
+    if not hasattr(os, "sched_getaffinity"):
+        return {}
+    available = os.sched_getaffinity(0)
+    if THREAD_CORES_OVERRIDE:
+        return {role: cores for role, cores in THREAD_CORES_OVERRIDE.items() if cores <= available}
+    
+    # 从编号最大的物理核心开始分配，避开通常承担中断处理的0号核心
+    cores = _physical_cores(available)[::-1]
+    if len(cores) < len(THREAD_ROLES):
+        return {}
+    return {role: {core} for role, core in zip(THREAD_ROLES, cores)}
+
+def pin_thread(cores, nice_increment=0, thread_id=0):
+    """
+    将线程绑定到指定CPU核心，可选提升当前线程优先级
+    thread_id为0表示当前线程，否则为目标线程的native_id；不支持亲和性的平台或cores为空时跳过绑定
+    """
+    if cores and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(thread_id, cores)
+        except OSError as e:
+            print(f"设置CPU亲和性失败: {e}")
+    
+    if nice_increment and hasattr(os, "nice"):
+        try:
+            os.nice(nice_increment)
+        except OSError as e:
+            print(f"提升线程优先级失败（需要CAP_SYS_NICE），保持默认优先级: {e}")
+
+def prepare_processing_frame(frame):
+    """
+    生成处理分辨率的工作帧
+    超过IMAGE_WIDTH x IMAGE_HEIGHT的帧先缩小，检测与可视化都在小图上进行；
+    控制参数均按该分辨率整定，因此像素偏移无需再换算
+    """
+    height, width = frame.shape[:2]
+    if width > IMAGE_WIDTH or height > IMAGE_HEIGHT:
+        return cv2.resize(frame, (IMAGE_WIDTH, IMAGE_HEIGHT), interpolation=cv2.INTER_AREA)
+    return frame.copy()
+
+def build_tracking_mosaic(annotated_frame, binary_image, mosaic=None):
+    """
+    将标注帧与二值图拼接为单个窗口画面，减少imshow调用次数
+    mosaic尺寸匹配时原地复用
+    """
+    height, width = annotated_frame.shape[:2]
+    if mosaic is None or mosaic.shape[:2] != (height, width * 2):
+        mosaic = np.empty((height, width * 2, 3), dtype=np.uint8)
+    
+    mosaic[:, :width] = annotated_frame
+    if binary_image is not None:
+        binary_resized = cv2.resize(binary_image, (width, height), interpolation=cv2.INTER_NEAREST)
+        mosaic[:, width:] = cv2.cvtColor(binary_resized, cv2.COLOR_GRAY2BGR)
+    else:
+        mosaic[:, width:] = 0
+    return mosaic
+
+def to_host_image(image):
+    """将UMat下载为numpy数组，普通数组原样返回"""
+    if isinstance(image, cv2.UMat):
+        return image.get()
+    return image
+
+def is_window_visible(window_name):
+    """判断调试窗口是否仍处于可见状态"""
+    try:
+        return cv2.getWindowProperty(window_name, cv2.WND_PROP_VISIBLE) >= 1
+    except cv2.error:
+        return False
+
 # 安全清理函数
 def safe_cleanup():
     global tello
@@ -351,6 +474,40 @@ lateral_pid = FuzzyPIDController(kp=0.4, ki=0.02, kd=0.15)    # 左右控制
 forward_pid = FuzzyPIDController(kp=0.35, ki=0.015, kd=0.12)  # 前后控制  
 direction_pid = FuzzyPIDController(kp=0.6, ki=0.03, kd=0.18)  # 方向控制
 
+# ==================== 后台遥测轮询 ====================
+class TelemetryPoller(threading.Thread):
+    """
+    后台遥测轮询线程
+    周期性读取电量、TOF距离和高度，主循环直接读取缓存值，避免阻塞控制
+    """
+    
+    def __init__(self, tello, interval=0.5, battery=50, tof=100, height=0, cores=None):
+        super().__init__(daemon=True)
+        self.tello = tello
+        self.cores = cores
+        self.interval = interval
+        self.battery = battery
+        self.tof = tof
+        self.height = height
+        self.last_update = 0.0
+        self._stop_event = threading.Event()
+    
+    def run(self):
+        pin_thread(self.cores)
+        while not self._stop_event.is_set():
+            try:
+                self.battery = self.tello.get_battery()
+                self.tof = self.tello.get_distance_tof()
+                self.height = self.tello.get_height()
+                self.last_update = time.time()
+            except Exception as e:
+                print(f"Telemetry poll error: {e}")
+            self._stop_event.wait(self.interval)
+    
+    def stop(self):
+        """停止轮询线程"""
+        self._stop_event.set()
+
 # ==================== 轨迹预测和历史分析 ====================
 class TrajectoryPredictor:
     """轨迹预测器，用于预测性控制"""
@@ -408,10 +565,7 @@ def normalize_angle_to_forward_reference(angle):
     前进方向(左侧)为0度
     """
     # 调整角度使左侧(前进方向)为0度
-    normalized = angle
-    if normalized > 180:
-        normalized -= 360
-    return normalized
+    return ((angle + 180.0) % 360.0) - 180.0
 
 def calculate_direction_score(normalized_angle):
     """
@@ -453,25 +607,20 @@ def detect_turn_improved(contour, points):
         sampled_points = points[::step]
         
         if len(sampled_points) >= 3:
-            directions = []
-            for i in range(1, len(sampled_points) - 1):
-                prev_pt = sampled_points[i-1]
-                curr_pt = sampled_points[i]
-                next_pt = sampled_points[i+1]
-                
-                vec1 = curr_pt - prev_pt
-                vec2 = next_pt - curr_pt
-                
-                if np.linalg.norm(vec1) > 0 and np.linalg.norm(vec2) > 0:
-                    # 计算两向量夹角
-                    cos_angle = np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
-                    cos_angle = np.clip(cos_angle, -1.0, 1.0)
-                    angle = np.degrees(np.arccos(cos_angle))
-                    directions.append(angle)
+            # 相邻采样点构成的向量及其长度（向量化计算）
+            vecs = np.diff(np.asarray(sampled_points, dtype=np.float32), axis=0)
+            norms = np.linalg.norm(vecs, axis=1)
+            valid = (norms[:-1] > 0) & (norms[1:] > 0)
             
-            # 如果有显著的方向变化，认为有转弯
-            if directions and (np.max(directions) > 45 or np.std(directions) > 15):
-                return True
+            if np.any(valid):
+                # 计算相邻向量夹角
+                cos_angle = np.einsum('ij,ij->i', vecs[:-1][valid], vecs[1:][valid])
+                cos_angle /= norms[:-1][valid] * norms[1:][valid]
+                directions = np.degrees(np.arccos(np.clip(cos_angle, -1.0, 1.0)))
+                
+                # 如果有显著的方向变化，认为有转弯
+                if directions.max() > 45 or directions.std() > 15:
+                    return True
     
     # 基于几何特征的转弯检测
     has_turn = (len(approx) > 5) or (solidity < 0.8)
@@ -517,7 +666,7 @@ def detect_track_optimized(frame):
     cv2.imshow("Binary Threshold", binary)
     
     # 检查二值化结果
-    white_pixels = np.sum(binary == 255)
+    white_pixels = cv2.countNonZero(binary)
     total_pixels = binary.shape[0] * binary.shape[1]
     white_ratio = white_pixels / total_pixels
     print(f"二值化后白色像素比例: {white_ratio:.3f}")
@@ -539,7 +688,7 @@ def detect_track_optimized(frame):
     cv2.imshow("Morphology Processed", binary_cleaned)
     
     # 检查形态学处理后的结果
-    white_pixels_after = np.sum(binary_cleaned == 255)
+    white_pixels_after = cv2.countNonZero(binary_cleaned)
     white_ratio_after = white_pixels_after / total_pixels
     print(f"形态学处理后白色像素比例: {white_ratio_after:.3f}")
     
@@ -858,17 +1007,47 @@ def calculate_track_following_control(track_result, coord_system, predictor):
     }
 
 # ==================== 智能控制执行函数 ====================
+def reset_sharp_turn_state():
+    """清除急转弯状态机（轨迹丢失时调用）"""
+    global sharp_turn_state, sharp_turn_until
+    sharp_turn_state = None
+    sharp_turn_until = 0.0
+
 def execute_smart_tracking_control(tello, control_result):
     """
     执行智能轨迹跟随控制
     根据不同的控制模式采用不同的执行策略
+    急转弯采用非阻塞状态机，执行期间视觉循环保持运行
     """
+    global sharp_turn_state, sharp_turn_until
+    
     # 确保控制参数是Python原生int类型
     lr = int(control_result["lr"])
     fb = int(control_result["fb"])
     yaw = int(control_result["yaw"])
     
     control_mode = control_result["control_mode"]
+    now = time.monotonic()
+    
+    # 推进急转弯状态机
+    if sharp_turn_state is not None:
+        if control_mode in ("ALIGNED_FORWARD", "FINE_TUNING"):
+            # 对齐已恢复，提前结束急转弯
+            print("对齐已恢复，结束急转弯")
+            reset_sharp_turn_state()
+        elif sharp_turn_state == "YAWING":
+            if now < sharp_turn_until:
+                return  # 保持原地偏航
+            # 偏航结束，转入缓慢前进
+            sharp_turn_state = "FORWARD"
+            sharp_turn_until = now + SHARP_TURN_FORWARD_DURATION
+            tello.send_rc_control(lr, int(MIN_FORWARD_SPEED), 0, 0)
+            return
+        elif sharp_turn_state == "FORWARD":
+            if now < sharp_turn_until:
+                return  # 保持缓慢前进
+            reset_sharp_turn_state()
+    
     if control_mode == "ALIGNED_FORWARD":
         # 完美对齐 - 流畅前进
         tello.send_rc_control(
@@ -931,10 +1110,10 @@ def execute_smart_tracking_control(tello, control_result):
     elif control_mode in ["TURN_FOLLOWING", "SHARP_TURN"]:
         # 转弯处理
         if control_mode == "SHARP_TURN":
-            print("执行急转弯跟随...")            # 急转弯：先转向再前进
+            print("执行急转弯跟随...")            # 急转弯：先转向再前进（由状态机在后续帧切换）
             tello.send_rc_control(0, 0, 0, yaw)
-            time.sleep(1.0)
-            tello.send_rc_control(int(lr), int(MIN_FORWARD_SPEED), 0, 0)
+            sharp_turn_state = "YAWING"
+            sharp_turn_until = now + SHARP_TURN_YAW_DURATION
         else:
             # 缓转弯：减速跟随
             tello.send_rc_control(
@@ -955,14 +1134,14 @@ def execute_smart_tracking_control(tello, control_result):
 def visualize_track_following(track_result, frame, control_result, coord_system, predictor):
     """
     可视化轨迹跟随状态 - 增强显示
+    OpenCL可用时在UMat上绘制，返回前下载为numpy数组
     """
     height, width, _ = frame.shape
     center_x, center_y = width // 2, height // 2
-    annotated_frame = frame.copy()
-    
-    # 显示二值化图像
-    if "binary_image" in track_result:
-        cv2.imshow("Track Binary", track_result["binary_image"])
+    if OPENCL_VIZ_ENABLED:
+        annotated_frame = cv2.UMat(frame)
+    else:
+        annotated_frame = frame.copy()
     
     # 显示坐标系信息
     cv2.putText(annotated_frame, "Downward View - Left=Forward", 
@@ -1078,7 +1257,7 @@ def visualize_track_following(track_result, frame, control_result, coord_system,
             cv2.putText(annotated_frame, "TURN DETECTED!", 
                        (width//2-80, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
         
-        return annotated_frame, control_result
+        return to_host_image(annotated_frame), control_result
     else:
         # 未检测到轨迹
         reason = track_result.get("reason", "unknown")
@@ -1089,12 +1268,14 @@ def visualize_track_following(track_result, frame, control_result, coord_system,
         cv2.putText(annotated_frame, "SEARCHING MODE", 
                    (center_x-80, center_y+30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 165, 255), 2)
         
-        return annotated_frame, {"lr": 0, "fb": 0, "yaw": 15, "control_mode": "SEARCHING"}
+        return to_host_image(annotated_frame), {"lr": 0, "fb": 0, "yaw": 15, "control_mode": "SEARCHING"}
 
 # ==================== 优化的主飞行测试函数 ====================
 def test_optimized_track_following():
     global tello, vignette_corrector
     
+    start_log_listener()
+    
     # 连接无人机
     print("Connecting to Tello...")
     try:
@@ -1104,9 +1285,11 @@ def test_optimized_track_following():
         print(f"Battery: {battery}%")
         if battery < 30:
             print("Battery too low, test cancelled!")
+            stop_log_listener()
             return
     except Exception as e:
         print(f"Cannot connect to Tello: {e}")
+        stop_log_listener()
         return
     
     # 初始化视频流
@@ -1117,6 +1300,7 @@ def test_optimized_track_following():
         time.sleep(2)
     except Exception as e:
         print(f"Video stream failed: {e}")
+        stop_log_listener()
         return
     
     # 创建测试输出目录
@@ -1130,6 +1314,7 @@ def test_optimized_track_following():
     # 起飞前LED指示
     print("Preparing for takeoff...")
 
+    telemetry = None
     
     try:
         # 执行起飞
@@ -1160,6 +1345,7 @@ def test_optimized_track_following():
             frame = frame_read.frame
             if frame is not None:
                 print(f"下视摄像头帧尺寸: {frame.shape}")
+                frame = prepare_processing_frame(frame)
                 vignette_corrector = VignetteCorrector(frame.shape, VIGNETTE_STRENGTH)
                 print("暗角校正器初始化完成")
                 break
@@ -1173,10 +1359,28 @@ def test_optimized_track_following():
         frame_count = 0
         last_track_detected = time.time()
         last_safety_check = time.time()
+        last_status = None  # 上一次输出的跟随状态
+        mosaic = None  # 主窗口拼接缓冲区
         battery = tello.get_battery()
         height_cm = FLIGHT_HEIGHT  # 初始化高度变量
         tof_distance = 100  # 初始化距离传感器变量
         
+        thread_cores = plan_thread_cores()
+        if thread_cores:
+            print(f"Thread cores: {thread_cores}")
+        
+        # 启动后台遥测轮询
+        telemetry = TelemetryPoller(tello, interval=0.5, battery=battery,
+                                    tof=tof_distance, height=height_cm,
+                                    cores=thread_cores.get("telemetry"))
+        telemetry.start()
+        
+        # 绑定视频读取线程（djitellopy的BackgroundFrameRead工作线程）与主控制循环所在核心
+        reader_worker = getattr(frame_read, "worker", None)
+        if reader_worker is not None and reader_worker.native_id is not None:
+            pin_thread(thread_cores.get("reader"), thread_id=reader_worker.native_id)
+        pin_thread(thread_cores.get("main"), MAIN_THREAD_NICE)
+        
         print("Starting OPTIMIZED Track Following with Trajectory Alignment...")
         print(f"Flight time: {AUTO_FLIGHT_TIME} seconds")
         print(f"Coordinate system: Left=Forward, Right=Backward, Up=Right, Down=Left")
@@ -1199,7 +1403,7 @@ def test_optimized_track_following():
                 time.sleep(0.1)
                 continue
             
-            frame = frame.copy()
+            frame = prepare_processing_frame(frame)
             height, width = frame.shape[:2]
             
             # 更新坐标系统（如果图像尺寸变化）
@@ -1211,34 +1415,27 @@ def test_optimized_track_following():
             if vignette_corrector is None:
                 vignette_corrector = VignetteCorrector(frame.shape, VIGNETTE_STRENGTH)
             
-            # 定期安全检查
+            # 定期安全检查 - 读取后台遥测缓存，不在主循环发起UDP查询
             if current_time - last_safety_check > AUTO_SAFETY_CHECK_INTERVAL:
-                try:
-                    battery = tello.get_battery()
-                    tof_distance = tello.get_distance_tof()
-                    height_cm = tello.get_height()
-                    
-                    if battery < 20:
-                        print(f"Battery critically low: {battery}%, auto landing")
-                        break
-                    
-                    if height_cm < 10:
-                        print(f"Height too low: {height_cm}cm, emergency landing")
-                        break
-                    
-                    if tof_distance < 15:
-                        print(f"Obstacle too close: {tof_distance}cm, stopping")
-                        tello.send_rc_control(0, 0, 0, 0)
-                        time.sleep(1)
-                        continue
-                    
-                    last_safety_check = current_time
-                    
-                except Exception as e:
-                    print(f"Safety check error: {e}")
-                    battery = 50
-                    tof_distance = 100
-                    height_cm = FLIGHT_HEIGHT
+                battery = telemetry.battery
+                tof_distance = telemetry.tof
+                height_cm = telemetry.height
+                
+                if battery < 20:
+                    print(f"Battery critically low: {battery}%, auto landing")
+                    break
+                
+                if height_cm < 10:
+                    print(f"Height too low: {height_cm}cm, emergency landing")
+                    break
+                
+                if tof_distance < 15:
+                    print(f"Obstacle too close: {tof_distance}cm, stopping")
+                    tello.send_rc_control(0, 0, 0, 0)
+                    time.sleep(1)
+                    continue
+                
+                last_safety_check = current_time
             
             # ==================== 核心轨迹跟随逻辑 ====================
             # 检测轨迹
@@ -1255,22 +1452,29 @@ def test_optimized_track_following():
             if track_result["found"]:
                 last_track_detected = current_time
                 
-                # 显示轨迹跟随状态
+                # 显示轨迹跟随状态 - 仅在模式变化或每隔若干帧输出
                 mode = control_result["control_mode"]
                 score = control_result["alignment_score"]
-                print(f"[轨迹跟随] 模式: {mode}, 对齐评分: {score:.1f}")
+                if mode != last_status or frame_count % STATUS_LOG_INTERVAL == 0:
+                    track_logger.info("[轨迹跟随] 模式: %s, 对齐评分: %.1f", mode, score)
+                    last_status = mode
                 
                 # 执行智能控制
                 execute_smart_tracking_control(tello, control_result)
                 
             else:
                 # 轨迹丢失处理
+                reset_sharp_turn_state()
                 if current_time - last_track_detected > 3:
-                    print("[轨迹跟随] 长时间丢失轨迹，执行搜索...")
+                    if last_status != "LOST_SEARCH" or frame_count % STATUS_LOG_INTERVAL == 0:
+                        track_logger.info("[轨迹跟随] 长时间丢失轨迹，执行搜索...")
+                        last_status = "LOST_SEARCH"
                     tello.send_rc_control(0, 0, 0, 20)
 
                 else:
-                    print("[轨迹跟随] 短暂丢失轨迹，悬停等待...")
+                    if last_status != "LOST_HOVER" or frame_count % STATUS_LOG_INTERVAL == 0:
+                        track_logger.info("[轨迹跟随] 短暂丢失轨迹，悬停等待...")
+                        last_status = "LOST_HOVER"
                     tello.send_rc_control(0, 0, 0, 0)
             
             # 显示飞行信息
@@ -1280,15 +1484,19 @@ def test_optimized_track_following():
             cv2.putText(annotated_frame, f"Battery: {battery}% | Height: {height_cm}cm", 
                        (width-250, height-40), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1)
             
-            # 显示坐标系十字线
-            cv2.line(annotated_frame, (width//2-15, height//2), (width//2+15, height//2), (255, 0, 0), 2)
-            cv2.line(annotated_frame, (width//2, height//2-15), (width//2, height//2+15), (255, 0, 0), 2)
+            # 显示坐标系十字线 - 轴对齐细线直接切片赋值
+            cx, cy = width // 2, height // 2
+            annotated_frame[cy-1:cy+1, cx-15:cx+15] = (255, 0, 0)
+            annotated_frame[cy-15:cy+15, cx-1:cx+1] = (255, 0, 0)
             
-            # 显示主窗口
-            cv2.imshow("Optimized Trajectory Following", annotated_frame)
+            # 显示主窗口（标注帧与二值图合并为单个窗口）
+            mosaic = build_tracking_mosaic(annotated_frame, track_result.get("binary_image"), mosaic)
+            cv2.imshow("Optimized Trajectory Following", mosaic)
             
-            # 显示暗角校正对比
-            if vignette_corrector is not None:
+            # 显示暗角校正对比 - 仅在窗口可见时低频刷新，前若干帧强制显示
+            if SHOW_GUI and vignette_corrector is not None and (
+                    frame_count < VIGNETTE_PREVIEW_INTERVAL or
+                    (frame_count % VIGNETTE_PREVIEW_INTERVAL == 0 and is_window_visible("Vignette Correction"))):
                 comparison = vignette_corrector.visualize_correction(frame)
                 if comparison is not None:
                     cv2.imshow("Vignette Correction", comparison)
@@ -1315,6 +1523,9 @@ def test_optimized_track_following():
     finally:
         print("Stopping optimized track following, preparing to land...")
         
+        if telemetry is not None:
+            telemetry.stop()
+        
         try:
             tello.send_rc_control(0, 0, 0, 0)
             time.sleep(1)
@@ -1330,6 +1541,7 @@ def test_optimized_track_following():
         
         print("Cleaning up...")
         safe_cleanup()
+        stop_log_listener()
 
 if __name__ == "__main__":
     test_optimized_track_following()
@@ -4,26 +4,49 @@
 采用 linetrack3.py 的优化检测流程
 """
 import cv2
+import os
 import time
+import math
 import numpy as np
 import threading
 import queue
+import zlib
 from collections import deque
 import traceback
 
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        """numba不可用时退化为普通Python函数"""
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# 方向优先级参数
+DIRECTION_TOLERANCE = 35      # 方向匹配容忍度（度）
+FORWARD_DIRECTION_BIAS = 2.5  # 前向方向评分加权
+
 # ==================== 暗角校正类 ====================
 class VignetteCorrector:
-    """无人机镜头暗角校正器"""
+    """
+    无人机镜头暗角校正器
+    crop_margin>0 时掩码只覆盖裁剪后的内部区域（中心仍按完整画面计算），
+    调用方先裁剪再校正，被裁掉的边缘像素不再参与计算
+    """
     
-    def __init__(self, image_shape, vignette_strength=0.4):
+    def __init__(self, image_shape, vignette_strength=0.4, crop_margin=0):
         self.height, self.width = image_shape[:2]
         self.vignette_strength = vignette_strength
-        self.correction_mask = self._create_correction_mask()
-        print(f"暗角校正器初始化: {self.width}x{self.height}, 强度={vignette_strength}")
+        self.crop_margin = crop_margin
+        self._shape = (self.height - crop_margin * 2, self.width - crop_margin * 2)
+        self._update_mask()
+        print(f"暗角校正器初始化: {self.width}x{self.height}, 裁剪边距={crop_margin}, 强度={vignette_strength}")
     
     def _create_correction_mask(self):
         center_x, center_y = self.width // 2, self.height // 2
-        y, x = np.ogrid[:self.height, :self.width]
+        margin = self.crop_margin
+        y, x = np.ogrid[margin:self.height - margin, margin:self.width - margin]
         distance = np.sqrt((x - center_x)**2 + (y - center_y)**2)
         max_distance = np.sqrt(center_x**2 + center_y**2)
         normalized_distance = distance / max_distance
@@ -31,69 +54,89 @@ class VignetteCorrector:
         correction_mask = np.clip(correction_mask, 1.0, 2.0)
         return correction_mask.astype(np.float32)
     
+    def _update_mask(self):
+        """重建校正掩码，并缓存三通道用的定点掩码"""
+        self.correction_mask = self._create_correction_mask()
+        # Q7定点（x128）：掩码上限2.0时 255*256 仍在uint16范围内
+        self.mask_q7 = np.round(self.correction_mask * 128).astype(np.uint16)[:, :, None]
+    
     def correct_vignette(self, image):
         if image is None:
             return None
             
-        current_height, current_width = image.shape[:2]
-        if current_height != self.height or current_width != self.width:
-            self.height, self.width = current_height, current_width
-            self.correction_mask = self._create_correction_mask()
-            
-        image_float = image.astype(np.float32)
+        if image.shape[:2] != self._shape:
+            # 输入为裁剪后的图像，按边距还原完整画面尺寸
+            self._shape = image.shape[:2]
+            self.height = self._shape[0] + self.crop_margin * 2
+            self.width = self._shape[1] + self.crop_margin * 2
+            self._update_mask()
         
-        if len(image.shape) == 3:
-            corrected = np.zeros_like(image_float)
-            for i in range(image.shape[2]):
-                corrected[:,:,i] = image_float[:,:,i] * self.correction_mask
-        else:
-            corrected = image_float * self.correction_mask
+        if image.ndim == 3:
+            # 彩色图：uint16定点乘法 + 右移，避免浮点中间结果
+            corrected = image.astype(np.uint16)
+            np.multiply(corrected, self.mask_q7, out=corrected)
+            np.right_shift(corrected, 7, out=corrected)
+            np.minimum(corrected, 255, out=corrected)
+            return corrected.astype(np.uint8)
         
-        corrected = np.clip(corrected, 0, 255)
+        # 灰度图保留浮点路径
+        corrected = image.astype(np.float32)
+        np.multiply(corrected, self.correction_mask, out=corrected)
+        np.clip(corrected, 0, 255, out=corrected)
         return corrected.astype(np.uint8)
 
 # ==================== 轨迹预测器 ====================
+@njit(cache=True)
+def _predict_position(xs, ys, head, size, steps_ahead):
+    """基于环形缓冲区最近两次观测做线性外推（安装numba时JIT编译）"""
+    last = (head - 1) % size
+    prev = (head - 2) % size
+    dx = xs[last] - xs[prev]
+    dy = ys[last] - ys[prev]
+    return xs[last] + dx * steps_ahead, ys[last] + dy * steps_ahead
+
 class TrajectoryPredictor:
-    """轨迹预测器，用于预测性控制"""
+    """轨迹预测器，用于预测性控制（位置历史按x/y分别存放在定长环形缓冲区中）"""
     
     def __init__(self, history_length=5):
-        self.position_history = deque(maxlen=history_length)
+        self.history_length = history_length
+        self._xs = np.zeros(history_length, dtype=np.float32)
+        self._ys = np.zeros(history_length, dtype=np.float32)
+        self._head = 0    # 下一次写入位置
+        self._count = 0   # 已写入的有效观测数
         self.direction_history = deque(maxlen=history_length)
         self.time_history = deque(maxlen=history_length)
     
     def add_observation(self, center_pos, direction_angle):
         """添加观测数据"""
         current_time = time.time()
-        self.position_history.append(center_pos)
+        self._xs[self._head] = center_pos[0]
+        self._ys[self._head] = center_pos[1]
+        self._head = (self._head + 1) % self.history_length
+        self._count = min(self._count + 1, self.history_length)
         self.direction_history.append(direction_angle)
         self.time_history.append(current_time)
     
     def predict_next_position(self, steps_ahead=3):
         """预测下一个位置"""
-        if len(self.position_history) < 3:
+        if self._count < 3:
             return None
         
         # 简单的线性预测
-        recent_positions = list(self.position_history)[-3:]
-        
-        # 计算运动向量
-        dx = recent_positions[-1][0] - recent_positions[-2][0]
-        dy = recent_positions[-1][1] - recent_positions[-2][1]
-        
-        # 预测位置
-        predicted_x = recent_positions[-1][0] + dx * steps_ahead
-        predicted_y = recent_positions[-1][1] + dy * steps_ahead
+        predicted_x, predicted_y = _predict_position(
+            self._xs, self._ys, self._head, self.history_length, steps_ahead)
         
         return (int(predicted_x), int(predicted_y))
     
     def get_movement_trend(self):
         """获取运动趋势"""
-        if len(self.position_history) < 2:
+        if self._count < 2:
             return "stable"
         
-        recent_positions = list(self.position_history)[-2:]
-        dx = recent_positions[-1][0] - recent_positions[-2][0]
-        dy = recent_positions[-1][1] - recent_positions[-2][1]
+        last = (self._head - 1) % self.history_length
+        prev = (self._head - 2) % self.history_length
+        dx = self._xs[last] - self._xs[prev]
+        dy = self._ys[last] - self._ys[prev]
         
         if abs(dx) < 2 and abs(dy) < 2:
             return "stable"
@@ -110,6 +153,7 @@ class DownwardCoordinateSystem:
         self.height = image_height
         self.center_x = image_width // 2
         self.center_y = image_height // 2
+        self._center = np.array([self.center_x, self.center_y], dtype=np.float32)
         
         # 控制参数 - 与linetrack3.py保持一致
         self.lateral_deadzone = 8        # 左右控制死区
@@ -121,11 +165,17 @@ class DownwardCoordinateSystem:
         self.max_yaw_speed = 20          # 最大偏航速度
         self.yaw_response_factor = 0.7   # 偏航响应系数
         
+        # 调试模式：生成控制映射的文字说明
+        self.debug = False
+        
         print(f"下视坐标系初始化: {self.width}x{self.height}, 中心=({self.center_x}, {self.center_y})")
         print("坐标系映射: 左=前进, 右=后退, 上=右侧, 下=左侧")
     
-    def image_to_drone_control(self, image_x, image_y):
-        """将图像坐标转换为无人机控制指令 - 与linetrack3.py一致"""
+    def image_to_drone_control_fast(self, image_x, image_y):
+        """
+        image_to_drone_control的内部快速版本
+        返回元组 (lr, fb, offset_x, offset_y)，不构造字典和说明字符串
+        """
         # 计算相对于图像中心的偏移
         offset_x = image_x - self.center_x  # 正值=右偏，负值=左偏
         offset_y = image_y - self.center_y  # 正值=下偏，负值=上偏
@@ -146,30 +196,55 @@ class DownwardCoordinateSystem:
         if abs(lr_control) < self.lateral_deadzone:
             lr_control = 0
         
-        # 限制控制范围
-        fb_control = np.clip(fb_control, -self.max_forward_speed, self.max_forward_speed)
-        lr_control = np.clip(lr_control, -self.max_lateral_speed, self.max_lateral_speed)
+        # 限制控制范围（标量使用min/max，避免np.clip的ufunc开销）
+        fb_control = max(-self.max_forward_speed, min(self.max_forward_speed, fb_control))
+        lr_control = max(-self.max_lateral_speed, min(self.max_lateral_speed, lr_control))
         
-        explanation = f"图像偏移({offset_x:.1f},{offset_y:.1f}) -> 控制(FB:{fb_control:.1f}, LR:{lr_control:.1f})"
+        return int(lr_control), int(fb_control), offset_x, offset_y
+    
+    def batch_image_to_control(self, points):
+        """
+        批量将图像坐标转换为控制量
         
-        return {
-            'lr': int(lr_control),
-            'fb': int(fb_control),
+        Args:
+            points: (N, 2) float32数组，每行为(x, y)
+        
+        Returns:
+            (fb, lr): 长度为N的数组，已应用死区、限幅并截断为整数值
+        """
+        offsets = points - self._center
+        fb = -offsets[:, 0] * self.position_sensitivity
+        lr = -offsets[:, 1] * self.position_sensitivity
+        
+        # 死区与限幅
+        fb = np.where(np.abs(fb) < self.forward_deadzone, 0.0, fb)
+        lr = np.where(np.abs(lr) < self.lateral_deadzone, 0.0, lr)
+        fb = np.trunc(np.minimum(np.maximum(fb, -self.max_forward_speed), self.max_forward_speed))
+        lr = np.trunc(np.minimum(np.maximum(lr, -self.max_lateral_speed), self.max_lateral_speed))
+        
+        return fb, lr
+    
+    def image_to_drone_control(self, image_x, image_y):
+        """将图像坐标转换为无人机控制指令 - 与linetrack3.py一致"""
+        lr_control, fb_control, offset_x, offset_y = self.image_to_drone_control_fast(image_x, image_y)
+        
+        result = {
+            'lr': lr_control,
+            'fb': fb_control,
             'offset_x': offset_x,
             'offset_y': offset_y,
-            'explanation': explanation
         }
+        
+        # 说明字符串仅在调试模式下生成
+        if self.debug:
+            result['explanation'] = f"图像偏移({offset_x:.1f},{offset_y:.1f}) -> 控制(FB:{fb_control:.1f}, LR:{lr_control:.1f})"
+        
+        return result
     
     def calculate_direction_control(self, line_angle, target_angle=0):
         """计算方向控制 - 与linetrack3.py一致"""
-        # 角度偏差计算
-        angle_error = line_angle - target_angle
-        
-        # 归一化到[-180, 180]
-        while angle_error > 180:
-            angle_error -= 360
-        while angle_error < -180:
-            angle_error += 360
+        # 角度偏差计算，取模归一化到[-180, 180)
+        angle_error = ((line_angle - target_angle + 180.0) % 360.0) - 180.0
         
         # 计算偏航控制
         yaw_control = angle_error * self.direction_sensitivity * self.yaw_response_factor
@@ -180,10 +255,7 @@ class DownwardCoordinateSystem:
 # ==================== 方向优化函数 ====================
 def normalize_angle_to_forward_reference(angle):
     """将角度归一化为以前进方向为参考的角度"""
-    normalized = angle
-    if normalized > 180:
-        normalized -= 360
-    return normalized
+    return ((angle + 180.0) % 360.0) - 180.0
 
 def calculate_direction_score(normalized_angle):
     """计算方向评分，前进方向(0度)得分最高"""
@@ -192,29 +264,109 @@ def calculate_direction_score(normalized_angle):
         angle_diff = 360 - angle_diff
     
     # 前向方向得分最高
-    direction_tolerance = 35
-    forward_direction_bias = 2.5
-    
-    if angle_diff <= direction_tolerance:
-        return forward_direction_bias
+    if angle_diff <= DIRECTION_TOLERANCE:
+        return FORWARD_DIRECTION_BIAS
     elif angle_diff <= 90:
         return 1.0 - (angle_diff / 90.0)
     else:
         return 0
 
-def detect_turn_improved(contour, points):
-    """改进的转弯检测算法"""
-    # 计算轮廓复杂度
-    perimeter = cv2.arcLength(contour, True)
-    approx = cv2.approxPolyDP(contour, 0.02 * perimeter, True)
+@njit(cache=True)
+def score_tracks(areas, widths, heights, solidities, angles):
+    """
+    批量计算候选轨迹评分（安装numba时JIT编译）
+    
+    Args:
+        areas, widths, heights, solidities: 候选轮廓几何特征数组
+        angles: 已归一化到0-360度的轨迹角度数组
+    
+    Returns:
+        (scores, normalized_angles, direction_scores, aspect_ratios)
+    """
+    n = areas.shape[0]
+    scores = np.empty(n, dtype=np.float64)
+    normalized_angles = np.empty(n, dtype=np.float64)
+    direction_scores = np.empty(n, dtype=np.float64)
+    aspect_ratios = np.empty(n, dtype=np.float64)
     
-    # 计算凸包和凸缺陷
+    for i in range(n):
+        aspect_ratio = max(widths[i], heights[i]) / min(widths[i], heights[i])
+        normalized = ((angles[i] + 180.0) % 360.0) - 180.0
+        angle_diff = abs(normalized)
+        
+        # 方向评分 - 与calculate_direction_score一致
+        if angle_diff <= DIRECTION_TOLERANCE:
+            direction_score = FORWARD_DIRECTION_BIAS
+        elif angle_diff <= 90:
+            direction_score = 1.0 - (angle_diff / 90.0)
+        else:
+            direction_score = 0.0
+        
+        score = 0.0
+        
+        # 长宽比评分
+        if aspect_ratio >= 1.5:
+            score += 2
+            if aspect_ratio >= 3.0:
+                score += 1
+        
+        # 面积评分
+        if 50 <= areas[i] <= 5000:
+            score += 2
+        elif areas[i] > 5000:
+            score += 1
+        
+        # 填充度评分
+        if solidities[i] > 0.6:
+            score += 1
+        
+        scores[i] = score + direction_score
+        normalized_angles[i] = normalized
+        direction_scores[i] = direction_score
+        aspect_ratios[i] = aspect_ratio
+    
+    return scores, normalized_angles, direction_scores, aspect_ratios
+
+@njit(cache=True, fastmath=True)
+def _compute_alignment_score(cx, cy, tx, ty, angle_error):
+    """
+    计算轨迹中心相对图像中心的偏移距离和对齐评分（安装numba时JIT编译）
+    
+    Returns:
+        (position_offset, alignment_score)
+    """
+    dx = tx - cx
+    dy = ty - cy
+    position_offset = math.sqrt(dx * dx + dy * dy)
+    alignment_score = max(0.0, 100.0 - position_offset * 2.0 - abs(angle_error))
+    return position_offset, alignment_score
+
+def to_host(image):
+    """UMat下载为numpy数组，普通数组原样返回"""
+    if isinstance(image, cv2.UMat):
+        return image.get()
+    return image
+
+def compute_contour_geometry(contour, area=None):
+    """计算轮廓的面积、凸包与填充度，供筛选和转弯检测共用"""
+    if area is None:
+        area = cv2.contourArea(contour)
     hull = cv2.convexHull(contour)
     hull_area = cv2.contourArea(hull)
-    contour_area = cv2.contourArea(contour)
-    
-    # 计算填充度
-    solidity = contour_area / hull_area if hull_area > 0 else 0
+    return {
+        'area': area,
+        'hull': hull,
+        'hull_area': hull_area,
+        'solidity': area / hull_area if hull_area > 0 else 0
+    }
+
+def detect_turn_improved(contour, points, geom=None):
+    """
+    改进的转弯检测算法
+    geom为候选筛选时已计算的几何特征，传入时不再重复计算
+    """
+    if geom is None:
+        geom = compute_contour_geometry(contour)
     
     # 计算轮廓的主要方向变化
     if len(points) >= 10:
@@ -223,28 +375,28 @@ def detect_turn_improved(contour, points):
         sampled_points = points[::step]
         
         if len(sampled_points) >= 3:
-            directions = []
-            for i in range(1, len(sampled_points) - 1):
-                prev_pt = sampled_points[i-1]
-                curr_pt = sampled_points[i]
-                next_pt = sampled_points[i+1]
-                
-                vec1 = curr_pt - prev_pt
-                vec2 = next_pt - curr_pt
+            # 相邻采样点构成的向量及其长度（向量化计算，float32输入时不再转换）
+            vecs = np.diff(np.asarray(sampled_points, dtype=np.float32), axis=0)
+            norms = np.linalg.norm(vecs, axis=1)
+            valid = (norms[:-1] > 0) & (norms[1:] > 0)
+            
+            if np.any(valid):
+                # 计算相邻向量夹角
+                cos_angle = np.einsum('ij,ij->i', vecs[:-1][valid], vecs[1:][valid])
+                cos_angle /= norms[:-1][valid] * norms[1:][valid]
+                directions = np.degrees(np.arccos(np.clip(cos_angle, -1.0, 1.0)))
                 
-                if np.linalg.norm(vec1) > 0 and np.linalg.norm(vec2) > 0:
-                    # 计算两向量夹角
-                    cos_angle = np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
-                    cos_angle = np.clip(cos_angle, -1.0, 1.0)
-                    angle = np.degrees(np.arccos(cos_angle))
-                    directions.append(angle)
-            
-            # 如果有显著的方向变化，认为有转弯
-            if directions and (np.max(directions) > 45 or np.std(directions) > 15):
-                return True
+                # 如果有显著的方向变化，认为有转弯
+                if directions.max() > 45 or directions.std() > 15:
+                    return True
+    
+    # 计算轮廓复杂度（方向分析未判定转弯时才需要）
+    if 'approx' not in geom:
+        geom['perimeter'] = cv2.arcLength(contour, True)
+        geom['approx'] = cv2.approxPolyDP(contour, 0.02 * geom['perimeter'], True)
     
     # 基于几何特征的转弯检测
-    has_turn = (len(approx) > 5) or (solidity < 0.8)
+    has_turn = (len(geom['approx']) > 5) or (geom['solidity'] < 0.8)
     
     return has_turn
 
@@ -263,11 +415,34 @@ class LineTrackModule:
         # 视频流相关
         self.frame_read = None
         self.current_frame = None
-        self.frame_queue = queue.Queue(maxsize=5)
+        
+        # 单槽最新帧缓冲：采集线程覆盖写入，检测线程取走后清空
+        # 检测慢于帧率时，未被取走的帧被覆盖即等于自适应跳帧，检测线程总是拿到最新帧
+        self._latest_frame = None
+        self._frame_lock = threading.Lock()
+        self._frame_ready = threading.Event()
+        
+        self.tracking_period = 1.0 / 30  # 控制线程调度周期（秒）
+        
+        # 采集/检测流水线
+        self.producer_thread = None
+        self.detector_thread = None
+        self._pipeline_stop = threading.Event()
+        self._result_lock = threading.Lock()
+        self._latest_result = None  # (validated_frame, track_result)
+        
+        # 调试显示开关（环境变量LINETRACK_DEBUG=1开启），关闭时跳过可视化与窗口显示
+        self.debug_display = bool(int(os.getenv("LINETRACK_DEBUG", "0")))
+        
+        # 显示线程：独占cv2.imshow/waitKey，处理线程只投递最新画面
+        self.display_thread = None
+        self.display_queue = queue.Queue(maxsize=1)  # (annotated_frame, binary)
         
         # 图像尺寸配置
         self.expected_width = 320
         self.expected_height = 240
+        self._expected_shape = (self.expected_height, self.expected_width)
+        self._validated_shape = None  # 最近一次通过验证的完整帧形状
         
         # 控制系统 - 使用增强版本
         self.coord_system = DownwardCoordinateSystem(self.expected_width, self.expected_height)
@@ -276,15 +451,83 @@ class LineTrackModule:
         # 暗角校正器
         self.vignette_corrector = None
         self.enable_vignette_correction = True
+        self._small_vignette = None        # 1/2分辨率检测用的暗角校正器
+        self._small_vignette_source = None
         
         # 裁剪边缘参数
         self.crop_margin = 20
         
+        # 候选筛选在1/2分辨率上进行，胜出轮廓回到全分辨率精修质心
+        self.pyramid_detection = True
+        
+        # 二值化方式："gaussian"=高斯模糊+阈值，"box"=均值滤波+比较
+        self.binarize_method = "gaussian"
+        
+        # OpenCL(T-API)可用时，预处理步骤在UMat上执行
+        self.use_opencl = cv2.ocl.haveOpenCL()
+        if self.use_opencl:
+            cv2.ocl.setUseOpenCL(True)
+        
+        # 形态学结构元素与检测中间缓冲区（按裁剪后尺寸复用）
+        self._kernel_small = cv2.getStructuringElement(cv2.MORPH_RECT, (2, 2))
+        self._kernel_medium = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+        self._kernel_refine = cv2.getStructuringElement(cv2.MORPH_RECT, (5, 5))
+        self._scratch_key = None
+        self._allocate_scratch((self.expected_height - self.crop_margin * 2,
+                                self.expected_width - self.crop_margin * 2))
+        
         # 控制参数
         self.track_alignment_tolerance = 3.0
         self.direction_threshold = 12.0
         self.min_forward_speed = 6
         
+        # 重复帧检测缓存
+        self._last_signature = None
+        self._last_result = None
+        
+        # 可视化绘制缓冲区（复用，避免每帧分配）
+        # 空闲绘制缓冲区池：显示线程显示完毕或画面被丢弃后归还，绘制时只取空闲的一块
+        # 同时最多占用三块（正在绘制、排队待显示、正在显示）
+        self._viz_pool = queue.SimpleQueue()
+        
+        # 可视化静态元素缓存（十字线、固定文字、评分条背景），按帧尺寸惰性生成
+        self._static_shape = None
+        self._static_overlay = None
+        self._static_mask = None
+        self._bar_overlay = None
+        self._bar_mask = None
+        self._info_y_positions = [30 + i * 18 for i in range(5)]
+        
+        # 详细信息条缓存：显示状态不变时不重新格式化、不重新光栅化
+        self._info_strip_top = 14
+        self._info_strip = None
+        self._info_strip_mask = None
+        self._prev_control_state = None
+        self._cached_info_lines = None
+        self._info_line_formats = (
+            "Mode: %s",
+            "Position Offset: %.1fpx",
+            "Angle Error: %.1f°",
+            "Track Size: %.0fx%.0f",
+            "Control: LR=%d FB=%d YAW=%d"
+        )
+        
+        # 控制模式 -> (轮廓颜色, 显示文字)；未列出的模式用灰色并显示模式名
+        self._mode_color_lut = {
+            "ALIGNED_FORWARD": ((0, 255, 0), "ALIGNED & FORWARD"),        # 绿色
+            "FINE_TUNING": ((0, 255, 255), "FINE TUNING"),                # 黄色
+            "DIRECTION_CORRECTION": ((0, 165, 255), "DIRECTION CORRECT"), # 橙色
+            "POSITION_CORRECTION": ((255, 0, 255), "POSITION CORRECT"),   # 紫色
+            "TURN_FOLLOWING": ((0, 0, 255), "TURN_FOLLOWING"),            # 红色
+            "SHARP_TURN": ((0, 0, 255), "SHARP_TURN"),                    # 红色
+        }
+        # 对齐评分颜色，按 (评分>80) + (评分>60) 索引：橙 / 黄 / 绿
+        self._score_color_lut = ((0, 165, 255), (0, 255, 255), (0, 255, 0))
+        
+        # 方向箭头用的1°分辨率(cos, sin)查找表
+        degrees = np.deg2rad(np.arange(360))
+        self._trig_lut = np.stack([np.cos(degrees), np.sin(degrees)], axis=1).tolist()
+        
         # 巡线状态
         self.track_detected = False
         self.last_track_time = 0
@@ -293,11 +536,46 @@ class LineTrackModule:
         
         print("✓ 巡线模块初始化完成（采用linetrack3优化流程）")
     
+    def _allocate_scratch(self, shape):
+        """
+        分配检测流程使用的单通道中间缓冲区（shape为裁剪后的全分辨率尺寸）
+        OpenCL路径下缓冲区置为None，由OpenCV在设备端分配UMat
+        """
+        self._scratch_key = (shape, self.use_opencl)
+        self._detect_shape = shape
+        if self.pyramid_detection:
+            self._detect_shape = ((shape[0] + 1) // 2, (shape[1] + 1) // 2)
+        
+        if self.use_opencl:
+            self._small_color = self._gray = self._blur = None
+            self._bin = self._bin_open = self._bin_close = None
+            return
+        
+        self._small_color = np.empty(self._detect_shape + (3,), dtype=np.uint8) if self.pyramid_detection else None
+        self._gray = np.empty(self._detect_shape, dtype=np.uint8)
+        self._blur = np.empty(self._detect_shape, dtype=np.uint8)
+        self._bin = np.empty(self._detect_shape, dtype=np.uint8)
+        self._bin_open = np.empty(self._detect_shape, dtype=np.uint8)
+        self._bin_close = np.empty(self._detect_shape, dtype=np.uint8)
+    
     def validate_and_crop_frame(self, frame):
         """验证并裁切图像到标准尺寸"""
         if frame is None:
             return None
         
+        # 快速路径：与上次通过验证的形状完全一致时直接返回
+        if frame.shape == self._validated_shape:
+            return frame
+        
+        # 尺寸正常：记录形状，后续帧直接走快速路径
+        if frame.shape[:2] == self._expected_shape:
+            self._validated_shape = frame.shape
+            return frame
+        
+        return self._slow_reshape(frame)
+    
+    def _slow_reshape(self, frame):
+        """异常尺寸图像的裁切/填充处理（仅在尺寸不符时调用）"""
         try:
             current_height, current_width = frame.shape[:2]
             
@@ -344,6 +622,71 @@ class LineTrackModule:
             print(f"❌ 图像裁切处理失败: {e}")
             return None
     
+    def _binarize(self, gray):
+        """模糊并按固定阈值提取黑线（结果写入复用缓冲区）"""
+        if self.binarize_method == "box":
+            blurred = cv2.boxFilter(gray, -1, (5, 5), dst=self._blur, normalize=True,
+                                    borderType=cv2.BORDER_REPLICATE)
+            return cv2.compare(blurred, 50, cv2.CMP_LE, dst=self._bin)
+        
+        blurred = cv2.GaussianBlur(gray, (5, 5), 0, dst=self._blur)
+        _, binary = cv2.threshold(blurred, 50, 255, cv2.THRESH_BINARY_INV, dst=self._bin)
+        return binary
+    
+    def _published_binary(self, binary):
+        """
+        复制二值图供其他线程显示
+        
+        二值图位于检测线程的复用缓冲区中，下一帧会原地覆盖；只在调试显示时才需要
+        """
+        return binary.copy() if self.debug_display else None
+    
+    def _detect_vignette(self, scale):
+        """返回与检测分辨率匹配的暗角校正器（1/2分辨率时画面尺寸与裁剪边距同比缩小）"""
+        full = self.vignette_corrector
+        if scale == 1:
+            return full
+        
+        if self._small_vignette_source is not full:
+            self._small_vignette = VignetteCorrector((full.height // scale, full.width // scale),
+                                                     full.vignette_strength, full.crop_margin // scale)
+            self._small_vignette_source = full
+        return self._small_vignette
+    
+    def _refine_centroid(self, color_full, contour):
+        """
+        在全分辨率图像上精修胜出轮廓的质心
+        仅对轮廓外接矩形ROI做灰度转换和暗角增益，掩码略微膨胀以覆盖放大后轮廓的边界误差
+        """
+        pad = 3
+        x, y, w, h = cv2.boundingRect(contour)
+        x0, y0 = max(0, x - pad), max(0, y - pad)
+        x1 = min(color_full.shape[1], x + w + pad)
+        y1 = min(color_full.shape[0], y + h + pad)
+        if x1 <= x0 or y1 <= y0:
+            return None
+        
+        roi_gray = cv2.cvtColor(color_full[y0:y1, x0:x1], cv2.COLOR_BGR2GRAY)
+        
+        # 与检测路径一致地做暗角校正（只作用于ROI）
+        corrector = self.vignette_corrector
+        if (corrector is not None and self.enable_vignette_correction
+                and corrector.correction_mask.shape == color_full.shape[:2]):
+            roi_gray = cv2.multiply(roi_gray, corrector.correction_mask[y0:y1, x0:x1],
+                                    dtype=cv2.CV_8U)
+        
+        roi_blurred = cv2.GaussianBlur(roi_gray, (5, 5), 0)
+        _, roi_binary = cv2.threshold(roi_blurred, 50, 255, cv2.THRESH_BINARY_INV)
+        
+        mask = np.zeros(roi_binary.shape, dtype=np.uint8)
+        cv2.drawContours(mask, [contour], -1, 255, -1, offset=(-x0, -y0))
+        mask = cv2.dilate(mask, self._kernel_refine)
+        
+        M = cv2.moments(cv2.bitwise_and(roi_binary, mask), binaryImage=True)
+        if M["m00"] == 0:
+            return None
+        return (M["m10"] / M["m00"] + x0, M["m01"] / M["m00"] + y0)
+    
     def detect_track_optimized(self, frame):
         """
         优化的轨迹检测函数 - 采用linetrack3.py的检测流程
@@ -357,156 +700,154 @@ class LineTrackModule:
             return {"found": False, "reason": "frame_validation_failed"}
         
         try:
-            # 步骤1: 暗角校正
-            if self.vignette_corrector is not None and self.enable_vignette_correction:
-                corrected_frame = self.vignette_corrector.correct_vignette(validated_frame)
+            # 步骤1：裁剪边缘，去除暗角或误差区域
+            height, width = validated_frame.shape[:2]
+            if height > self.crop_margin * 2 and width > self.crop_margin * 2:
+                cropped_frame = validated_frame[self.crop_margin:height-self.crop_margin, 
+                                                self.crop_margin:width-self.crop_margin]
             else:
-                corrected_frame = validated_frame
+                cropped_frame = validated_frame
             
-            # 步骤2：裁剪边缘，去除暗角或误差区域
-            height, width = corrected_frame.shape[:2]
-            if height > self.crop_margin * 2 and width > self.crop_margin * 2:
-                cropped_frame = corrected_frame[self.crop_margin:height-self.crop_margin, 
-                                              self.crop_margin:width-self.crop_margin]
+            # 尺寸或执行后端变化时重新分配中间缓冲区
+            if (cropped_frame.shape[:2], self.use_opencl) != self._scratch_key:
+                self._allocate_scratch(cropped_frame.shape[:2])
+            
+            # 步骤2: 降采样到1/2分辨率（面积插值），后续暗角校正与各步骤只处理1/4像素
+            # 全分辨率图像只在质心精修时按ROI访问
+            if self.pyramid_detection:
+                detect_frame = cv2.resize(cropped_frame, self._detect_shape[::-1], dst=self._small_color,
+                                          interpolation=cv2.INTER_AREA)
+                scale = 2
             else:
-                cropped_frame = corrected_frame
+                detect_frame = cropped_frame
+                scale = 1
             
-            # 步骤3: 转换为灰度图
-            gray = cv2.cvtColor(cropped_frame, cv2.COLOR_BGR2GRAY)
+            # 步骤2b: 暗角校正（掩码按检测分辨率的裁剪后尺寸预计算）
+            if self.vignette_corrector is not None and self.enable_vignette_correction:
+                detect_frame = self._detect_vignette(scale).correct_vignette(detect_frame)
+            
+            # OpenCL路径：只上传一次，步骤3-6在设备端执行
+            source = cv2.UMat(detect_frame) if self.use_opencl else detect_frame
             
-            # 步骤4: 高斯模糊
-            blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+            # 步骤3: 转换为灰度图
+            gray = cv2.cvtColor(source, cv2.COLOR_BGR2GRAY, dst=self._gray)
             
-            # 步骤5: 使用固定阈值方法
-            _, binary = cv2.threshold(blurred, 50, 255, cv2.THRESH_BINARY_INV)
+            # 步骤4-5: 模糊 + 固定阈值二值化
+            binary = self._binarize(gray)
             
             # 检查二值化结果
-            white_pixels = np.sum(binary == 255)
-            total_pixels = binary.shape[0] * binary.shape[1]
+            white_pixels = cv2.countNonZero(binary)
+            total_pixels = self._detect_shape[0] * self._detect_shape[1]
             white_ratio = white_pixels / total_pixels
             
             if white_ratio < 0.001:
-                return {"found": False, "reason": "no_white_pixels", "binary": binary, "validated_frame": validated_frame}
+                return {"found": False, "reason": "no_white_pixels", "binary": self._published_binary(to_host(binary)), "validated_frame": validated_frame}
             
             # 步骤6: 优化的形态学处理
-            kernel_small = cv2.getStructuringElement(cv2.MORPH_RECT, (2, 2))
-            kernel_medium = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
-            
             # 轻微的开运算去除小噪声
-            binary_cleaned = cv2.morphologyEx(binary, cv2.MORPH_OPEN, kernel_small, iterations=1)
+            binary_cleaned = cv2.morphologyEx(binary, cv2.MORPH_OPEN, self._kernel_small,
+                                              dst=self._bin_open, iterations=1)
             # 轻微的闭运算连接断裂
-            binary_cleaned = cv2.morphologyEx(binary_cleaned, cv2.MORPH_CLOSE, kernel_medium, iterations=1)
+            binary_cleaned = cv2.morphologyEx(binary_cleaned, cv2.MORPH_CLOSE, self._kernel_medium,
+                                              dst=self._bin_close, iterations=1)
             
             # 检查形态学处理后的结果
-            white_pixels_after = np.sum(binary_cleaned == 255)
+            white_pixels_after = cv2.countNonZero(binary_cleaned)
             white_ratio_after = white_pixels_after / total_pixels
             
             if white_ratio_after < 0.0005:
                 binary_cleaned = binary
             
+            # 轮廓检测与ROI计算在主机端进行
+            binary_cleaned = to_host(binary_cleaned)
+            
             # 步骤7: 轮廓检测
             contours, _ = cv2.findContours(binary_cleaned, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
             
             if not contours:
-                return {"found": False, "reason": "no_contours", "binary": binary_cleaned, "validated_frame": validated_frame}
+                return {"found": False, "reason": "no_contours", "binary": self._published_binary(binary_cleaned), "validated_frame": validated_frame}
             
             # 步骤8: 改进的轨迹候选筛选 - 加入方向优先级
-            valid_tracks = []
+            # 先用OpenCV收集候选几何特征，再批量评分
+            candidates = []
             
-            for i, contour in enumerate(contours):
+            for i, contour_small in enumerate(contours):
+                # 几何特征统一在全分辨率坐标下计算，沿用原有阈值
+                contour = contour_small * scale if scale != 1 else contour_small
                 area = cv2.contourArea(contour)
                 
                 # 面积筛选
                 if area < 30 or area > 2500:
                     continue
                 
-                # 检查轮廓是否主要由白色像素组成
-                mask = np.zeros(binary_cleaned.shape, dtype=np.uint8)
-                cv2.fillPoly(mask, [contour], 255)
-                white_in_contour = np.sum((binary_cleaned == 255) & (mask == 255))
-                contour_area_pixels = np.sum(mask == 255)
+                # 廉价的提前剔除：小而方正的斑点视为噪声，跳过后续几何计算
+                x, y, w, h = cv2.boundingRect(contour_small)
+                if area < 50 and max(w, h) / max(1, min(w, h)) < 1.5:
+                    continue
                 
-                if contour_area_pixels > 0:
-                    white_ratio_in_contour = white_in_contour / contour_area_pixels
-                    
-                    # 主要由白色像素组成的区域
-                    if white_ratio_in_contour > 0.5:
-                        # 计算几何特征
-                        rect = cv2.minAreaRect(contour)
-                        width_rect, height_rect = rect[1]
-                        
-                        if width_rect > 0 and height_rect > 0:
-                            aspect_ratio = max(width_rect, height_rect) / min(width_rect, height_rect)
-                            
-                            # 计算轨迹方向
-                            points = contour.reshape(-1, 2)
-                            if len(points) >= 5:
-                                try:
-                                    # 使用PCA计算主方向
-                                    centroid = np.mean(points, axis=0)
-                                    centered_points = points - centroid
-                                    cov_matrix = np.cov(centered_points.T)
-                                    eigenvalues, eigenvectors = np.linalg.eig(cov_matrix)
-                                    main_direction = eigenvectors[:, np.argmax(eigenvalues)]
-                                    track_angle = np.degrees(np.arctan2(main_direction[1], main_direction[0]))
-                                except:
-                                    track_angle = rect[2]
-                                    if rect[1][0] < rect[1][1]:
-                                        track_angle += 90
-                            else:
-                                track_angle = rect[2]
-                                if rect[1][0] < rect[1][1]:
-                                    track_angle += 90
-                            
-                            # 归一化角度
-                            track_angle = track_angle % 360
-                            normalized_angle = normalize_angle_to_forward_reference(track_angle)
-                            direction_score = calculate_direction_score(normalized_angle)
-                            
-                            # 计算填充度
-                            hull = cv2.convexHull(contour)
-                            hull_area = cv2.contourArea(hull)
-                            solidity = area / hull_area if hull_area > 0 else 0
-                            
-                            # 改进的评分系统
-                            score = 0
-                            
-                            # 长宽比评分
-                            if aspect_ratio >= 1.5:
-                                score += 2
-                                if aspect_ratio >= 3.0:
-                                    score += 1
-                            
-                            # 面积评分
-                            if 50 <= area <= 5000:
-                                score += 2
-                            elif area > 5000:
-                                score += 1
-                            
-                            # 填充度评分
-                            if solidity > 0.6:
-                                score += 1
-                            
-                            # 方向评分
-                            score += direction_score
-                            
-                            if score >= 2:
-                                valid_tracks.append({
-                                    'contour': contour,
-                                    'area': area,
-                                    'aspect_ratio': aspect_ratio,
-                                    'solidity': solidity,
-                                    'track_angle': track_angle,
-                                    'normalized_angle': normalized_angle,
-                                    'direction_score': direction_score,
-                                    'score': score,
-                                    'rect': rect,
-                                    'width': width_rect,
-                                    'height': height_rect
-                                })
+                # 检查轮廓是否主要由白色像素组成 - 仅在外接矩形ROI内构建掩码
+                roi = binary_cleaned[y:y+h, x:x+w]
+                mask = np.zeros((h, w), dtype=np.uint8)
+                cv2.drawContours(mask, [contour_small], -1, 255, -1, offset=(-x, -y))
+                white_in_contour = cv2.countNonZero(cv2.bitwise_and(roi, mask))
+                contour_area_pixels = cv2.countNonZero(mask)
+                
+                # 主要由白色像素组成的区域
+                if contour_area_pixels == 0 or white_in_contour / contour_area_pixels <= 0.5:
+                    continue
+                
+                # 计算几何特征
+                rect = cv2.minAreaRect(contour)
+                width_rect, height_rect = rect[1]
+                if width_rect <= 0 or height_rect <= 0:
+                    continue
+                
+                # 计算轨迹方向 - 由二阶中心矩闭式求主轴角度
+                M = cv2.moments(contour)
+                if M["m00"] != 0:
+                    track_angle = np.degrees(0.5 * np.arctan2(2 * M["mu11"], M["mu20"] - M["mu02"]))
+                else:
+                    track_angle = rect[2]
+                    if rect[1][0] < rect[1][1]:
+                        track_angle += 90
+                
+                # 计算填充度（几何特征每个轮廓只计算一次）
+                geom = compute_contour_geometry(contour, area)
+                geom['rect'] = rect
+                geom['moments'] = M
+                
+                candidates.append((contour, area, width_rect, height_rect, track_angle % 360, geom))
+            
+            valid_tracks = []
+            if candidates:
+                areas = np.array([c[1] for c in candidates], dtype=np.float64)
+                widths = np.array([c[2] for c in candidates], dtype=np.float64)
+                heights = np.array([c[3] for c in candidates], dtype=np.float64)
+                angles = np.array([c[4] for c in candidates], dtype=np.float64)
+                solidities = np.array([c[5]['solidity'] for c in candidates], dtype=np.float64)
+                
+                scores, normalized_angles, direction_scores, aspect_ratios = score_tracks(
+                    areas, widths, heights, solidities, angles)
+                
+                for idx in np.flatnonzero(scores >= 2):
+                    contour, area, width_rect, height_rect, track_angle, geom = candidates[idx]
+                    valid_tracks.append({
+                        'contour': contour,
+                        'area': area,
+                        'aspect_ratio': float(aspect_ratios[idx]),
+                        'solidity': geom['solidity'],
+                        'track_angle': track_angle,
+                        'normalized_angle': float(normalized_angles[idx]),
+                        'direction_score': float(direction_scores[idx]),
+                        'score': float(scores[idx]),
+                        'rect': geom['rect'],
+                        'geom': geom,
+                        'width': width_rect,
+                        'height': height_rect
+                    })
             
             if not valid_tracks:
-                return {"found": False, "reason": "no_valid_tracks", "binary": binary_cleaned, "validated_frame": validated_frame}
+                return {"found": False, "reason": "no_valid_tracks", "binary": self._published_binary(binary_cleaned), "validated_frame": validated_frame}
             
             # 步骤9: 选择最佳轨迹
             if len(valid_tracks) == 1:
@@ -517,23 +858,32 @@ class LineTrackModule:
                 best_track = valid_tracks[0]
                 
                 # 如果存在前向方向的轨迹，优先选择
-                forward_candidates = [track for track in valid_tracks if track['direction_score'] >= 2.5]
-                if forward_candidates and best_track['direction_score'] < 2.5:
+                forward_candidates = [track for track in valid_tracks if track['direction_score'] >= FORWARD_DIRECTION_BIAS]
+                if forward_candidates and best_track['direction_score'] < FORWARD_DIRECTION_BIAS:
                     best_forward = max(forward_candidates, key=lambda x: x['score'])
                     if best_forward['score'] >= best_track['score'] * 0.8:
                         best_track = best_forward
             
             contour = best_track['contour']
             
-            # 步骤10: 计算轨迹中心和特征
-            M = cv2.moments(contour)
+            # 步骤10: 计算轨迹中心和特征（复用候选筛选时的矩）
+            M = best_track['geom']['moments']
             
             if M["m00"] == 0:
-                return {"found": False, "reason": "zero_moment", "binary": binary_cleaned, "validated_frame": validated_frame}
+                return {"found": False, "reason": "zero_moment", "binary": self._published_binary(binary_cleaned), "validated_frame": validated_frame}
+            
+            centroid_x = M["m10"] / M["m00"]
+            centroid_y = M["m01"] / M["m00"]
+            
+            # 降采样筛选时，回到全分辨率精修质心
+            if scale != 1:
+                refined = self._refine_centroid(cropped_frame, contour)
+                if refined is not None:
+                    centroid_x, centroid_y = refined
             
             # 计算轨迹中心点（需要加上裁剪偏移）
-            cx = int(M["m10"] / M["m00"]) + self.crop_margin
-            cy = int(M["m01"] / M["m00"]) + self.crop_margin
+            cx = int(centroid_x) + self.crop_margin
+            cy = int(centroid_y) + self.crop_margin
             
             # 轨迹方向角度
             track_angle = best_track['track_angle']
@@ -542,9 +892,9 @@ class LineTrackModule:
             track_width = min(best_track['width'], best_track['height'])
             track_length = max(best_track['width'], best_track['height'])
             
-            # 转弯检测
-            points = contour.reshape(-1, 2)
-            has_turn = detect_turn_improved(contour, points)
+            # 转弯检测 - 轮廓点一次性转换为连续的(N,2) float32数组
+            points = np.ascontiguousarray(contour.reshape(-1, 2), dtype=np.float32)
+            has_turn = detect_turn_improved(contour, points, best_track['geom'])
             
             return {
                 "found": True,
@@ -556,7 +906,7 @@ class LineTrackModule:
                 "track_length": float(track_length),
                 "has_turn": has_turn,
                 "contour": contour,
-                "binary": binary_cleaned,
+                "binary": self._published_binary(binary_cleaned),
                 "validated_frame": validated_frame,
                 "track_info": best_track,
                 "candidates_count": len(valid_tracks),
@@ -569,9 +919,24 @@ class LineTrackModule:
             print(f"优化轨迹检测错误: {e}")
             return {"found": False, "reason": f"error: {e}", "validated_frame": validated_frame}
     
+    def _frame_signature(self, frame):
+        """计算帧的轻量指纹：缓冲区地址 + 稀疏采样像素的CRC"""
+        sample = np.ascontiguousarray(frame[::16, ::16])
+        return (frame.ctypes.data, frame.shape, zlib.crc32(sample))
+    
     def detect_track(self, frame):
-        """轨迹检测 - 使用优化版本"""
-        return self.detect_track_optimized(frame)
+        """轨迹检测 - 使用优化版本，重复帧直接返回上次结果"""
+        if frame is None:
+            return self.detect_track_optimized(frame)
+        
+        signature = self._frame_signature(frame)
+        if signature == self._last_signature and self._last_result is not None:
+            return self._last_result
+        
+        result = self.detect_track_optimized(frame)
+        self._last_signature = signature
+        self._last_result = result
+        return result
     
     def calculate_track_following_control(self, track_result):
         """
@@ -595,16 +960,16 @@ class LineTrackModule:
         self.predictor.add_observation(track_center, track_angle)
         
         # 基础位置控制
-        position_control = self.coord_system.image_to_drone_control(track_center[0], track_center[1])
-        base_lr = position_control['lr']
-        base_fb = position_control['fb']
+        base_lr, base_fb, _, _ = self.coord_system.image_to_drone_control_fast(
+            track_center[0], track_center[1])
         
         # 方向控制
         yaw_control, angle_error = self.coord_system.calculate_direction_control(track_angle, 0)
         
         # 计算对齐评分
-        position_offset = np.sqrt(position_control['offset_x']**2 + position_control['offset_y']**2)
-        alignment_score = max(0, 100 - position_offset * 2 - abs(angle_error))
+        position_offset, alignment_score = _compute_alignment_score(
+            float(self.coord_system.center_x), float(self.coord_system.center_y),
+            float(track_center[0]), float(track_center[1]), float(angle_error))
         
         # 根据对齐情况决定控制模式
         if position_offset <= self.track_alignment_tolerance and abs(angle_error) <= self.direction_threshold:
@@ -614,8 +979,10 @@ class LineTrackModule:
             # 预测性控制
             predicted_pos = self.predictor.predict_next_position()
             if predicted_pos:
-                future_control = self.coord_system.image_to_drone_control(predicted_pos[0], predicted_pos[1])
-                final_lr = int(base_lr * 0.7 + future_control['lr'] * 0.3)
+                # 当前位置与预测位置一次批量计算
+                points = np.array([track_center, predicted_pos], dtype=np.float32)
+                _, lr = self.coord_system.batch_image_to_control(points)
+                final_lr = int(lr[0] * 0.7 + lr[1] * 0.3)
                 final_fb = max(self.min_forward_speed, int(base_fb * 0.5 + self.coord_system.max_forward_speed * 0.8))
             else:
                 final_lr = base_lr
@@ -716,6 +1083,63 @@ class LineTrackModule:
             # 正常控制
             self.single_tello.send_rc_control(lr, fb, 0, yaw)
     
+    def _build_static_overlay(self, shape):
+        """一次性绘制可视化中不随帧变化的元素，生成覆盖层及其掩码"""
+        height, width = shape[:2]
+        center_x, center_y = width // 2, height // 2
+        
+        # 常驻元素：坐标系十字线、坐标系信息、标题
+        overlay = np.zeros(shape, dtype=np.uint8)
+        cv2.line(overlay, (center_x-15, center_y), (center_x+15, center_y), (255, 0, 0), 2)
+        cv2.line(overlay, (center_x, center_y-15), (center_x, center_y+15), (255, 0, 0), 2)
+        cv2.circle(overlay, (center_x, center_y), 6, (255, 0, 0), -1)
+        cv2.putText(overlay, "Downward View - Left=Forward", 
+                   (10, height-80), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 255), 1)
+        cv2.putText(overlay, f"Size: {width}x{height}", 
+                   (width-100, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 255), 1)
+        cv2.putText(overlay, "Optimized Line Tracking (linetrack3.py algorithm)", 
+                   (10, height-20), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 0), 1)
+        
+        # 对齐评分条背景（仅检测到轨迹时显示）
+        bar_overlay = np.zeros(shape, dtype=np.uint8)
+        bar_mask = np.zeros((height, width, 1), dtype=np.bool_)
+        score_bar_x = width - 150 - 10
+        bar_overlay[10:10 + 15 + 1, score_bar_x:score_bar_x + 150 + 1] = (50, 50, 50)
+        bar_mask[10:10 + 15 + 1, score_bar_x:score_bar_x + 150 + 1] = True
+        
+        self._static_shape = shape
+        self._static_overlay = overlay
+        self._static_mask = overlay.max(axis=2, keepdims=True) >= 64
+        self._bar_overlay = bar_overlay
+        self._bar_mask = bar_mask
+    
+    def _render_info_strip(self, info_lines, mode_color, width):
+        """把五行详细信息一次性绘制到缓存的信息条（及其掩码）上"""
+        strip_height = self._info_y_positions[-1] + 8 - self._info_strip_top
+        if self._info_strip is None or self._info_strip.shape[:2] != (strip_height, width):
+            self._info_strip = np.zeros((strip_height, width, 3), dtype=np.uint8)
+        else:
+            self._info_strip.fill(0)
+        
+        for i, text in enumerate(info_lines):
+            y_pos = self._info_y_positions[i] - self._info_strip_top
+            
+            if i == 0:  # 模式
+                color = mode_color
+                thickness = 2
+            elif i == 4:  # 控制指令
+                color = (255, 0, 0)
+                thickness = 2
+            else:
+                color = (255, 255, 255)
+                thickness = 1
+            
+            cv2.putText(self._info_strip, text, (10, y_pos), 
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.45, color, thickness)
+        
+        # 按覆盖度阈值取掩码：文字带抗锯齿边缘时不把暗色边缘像素贴到画面上
+        self._info_strip_mask = self._info_strip.max(axis=2, keepdims=True) >= 64
+    
     def visualize_tracking(self, frame, track_result, control_result):
         """可视化巡线状态 - 增强版本"""
         # 优先使用验证后的帧
@@ -729,44 +1153,28 @@ class LineTrackModule:
         if working_frame is None:
             return None
         
-        annotated_frame = working_frame.copy()
+        # 拷贝到空闲的复用绘制缓冲区（池中没有时新分配）
+        try:
+            annotated_frame = self._viz_pool.get_nowait()
+        except queue.Empty:
+            annotated_frame = None
+        if annotated_frame is None or annotated_frame.shape != working_frame.shape:
+            annotated_frame = np.empty_like(working_frame)
+        np.copyto(annotated_frame, working_frame)
         height, width = annotated_frame.shape[:2]
         center_x, center_y = width // 2, height // 2
         
-        # 显示坐标系十字线
-        cv2.line(annotated_frame, (center_x-15, center_y), (center_x+15, center_y), (255, 0, 0), 2)
-        cv2.line(annotated_frame, (center_x, center_y-15), (center_x, center_y+15), (255, 0, 0), 2)
-        cv2.circle(annotated_frame, (center_x, center_y), 6, (255, 0, 0), -1)
-        
-        # 显示坐标系信息
-        cv2.putText(annotated_frame, "Downward View - Left=Forward", 
-                   (10, height-80), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 255), 1)
-        cv2.putText(annotated_frame, f"Size: {width}x{height}", 
-                   (width-100, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 255), 1)
+        # 贴上缓存的静态元素（十字线、坐标系信息、标题）
+        if self._static_shape != annotated_frame.shape:
+            self._build_static_overlay(annotated_frame.shape)
+        np.copyto(annotated_frame, self._static_overlay, where=self._static_mask)
         
         if track_result["found"]:
             # 根据控制模式选择颜色
             control_mode = control_result["control_mode"]
             alignment_score = control_result["alignment_score"]
             
-            if control_mode == "ALIGNED_FORWARD":
-                contour_color = (0, 255, 0)  # 绿色
-                mode_text = "ALIGNED & FORWARD"
-            elif control_mode == "FINE_TUNING":
-                contour_color = (0, 255, 255)  # 黄色
-                mode_text = "FINE TUNING"
-            elif control_mode == "DIRECTION_CORRECTION":
-                contour_color = (0, 165, 255)  # 橙色
-                mode_text = "DIRECTION CORRECT"
-            elif control_mode == "POSITION_CORRECTION":
-                contour_color = (255, 0, 255)  # 紫色
-                mode_text = "POSITION CORRECT"
-            elif control_mode in ["TURN_FOLLOWING", "SHARP_TURN"]:
-                contour_color = (0, 0, 255)  # 红色
-                mode_text = control_mode
-            else:
-                contour_color = (128, 128, 128)  # 灰色
-                mode_text = control_mode
+            contour_color, mode_text = self._mode_color_lut.get(control_mode, ((128, 128, 128), control_mode))
             
             # 绘制轨迹轮廓
             cv2.drawContours(annotated_frame, [track_result["contour"]], -1, contour_color, 3)
@@ -781,11 +1189,11 @@ class LineTrackModule:
             
             # 绘制轨迹方向箭头
             track_angle = track_result["track_angle"]
-            angle_rad = np.radians(track_angle)
+            cos_a, sin_a = self._trig_lut[int(track_angle) % 360]
             arrow_length = 60
             
-            end_x = int(track_center[0] + arrow_length * np.cos(angle_rad))
-            end_y = int(track_center[1] + arrow_length * np.sin(angle_rad))
+            end_x = int(track_center[0] + arrow_length * cos_a)
+            end_y = int(track_center[1] + arrow_length * sin_a)
             cv2.arrowedLine(annotated_frame, track_center, (end_x, end_y), contour_color, 3, tipLength=0.4)
             
             # 绘制预测位置
@@ -801,13 +1209,12 @@ class LineTrackModule:
             score_bar_x = width - score_bar_width - 10
             score_bar_y = 10
             
-            # 背景条
-            cv2.rectangle(annotated_frame, (score_bar_x, score_bar_y), 
-                         (score_bar_x + score_bar_width, score_bar_y + score_bar_height), (50, 50, 50), -1)
+            # 背景条（缓存）
+            np.copyto(annotated_frame, self._bar_overlay, where=self._bar_mask)
             
             # 分数条
             score_width = int((alignment_score / 100.0) * score_bar_width)
-            score_color = (0, 255, 0) if alignment_score > 80 else (0, 255, 255) if alignment_score > 60 else (0, 165, 255)
+            score_color = self._score_color_lut[(alignment_score > 80) + (alignment_score > 60)]
             cv2.rectangle(annotated_frame, (score_bar_x, score_bar_y), 
                          (score_bar_x + score_width, score_bar_y + score_bar_height), score_color, -1)
             
@@ -815,30 +1222,32 @@ class LineTrackModule:
                        (score_bar_x, score_bar_y + score_bar_height + 15), 
                        cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1)
             
-            # 显示详细信息
-            info_lines = [
-                f"Mode: {mode_text}",
-                f"Position Offset: {control_result['position_offset']:.1f}px",
-                f"Angle Error: {control_result['angle_error']:.1f}°",
-                f"Track Size: {track_result['track_width']:.0f}x{track_result['track_length']:.0f}",
-                f"Control: LR={control_result['lr']} FB={control_result['fb']} YAW={control_result['yaw']}"
-            ]
-            
-            for i, text in enumerate(info_lines):
-                y_pos = 30 + i * 18
-                
-                if i == 0:  # 模式
-                    color = contour_color
-                    thickness = 2
-                elif i == 4:  # 控制指令
-                    color = (255, 0, 0)
-                    thickness = 2
-                else:
-                    color = (255, 255, 255)
-                    thickness = 1
-                
-                cv2.putText(annotated_frame, text, (10, y_pos), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.45, color, thickness)
+            # 显示详细信息：按显示精度取整后的状态不变时，文字和信息条都直接复用
+            info_state = (
+                mode_text,
+                round(control_result['position_offset'], 1),
+                round(control_result['angle_error'], 1),
+                round(track_result['track_width']),
+                round(track_result['track_length']),
+                control_result['lr'], control_result['fb'], control_result['yaw'],
+                width
+            )
+            if info_state != self._prev_control_state:
+                mode_fmt, offset_fmt, angle_fmt, size_fmt, control_fmt = self._info_line_formats
+                self._cached_info_lines = [
+                    mode_fmt % mode_text,
+                    offset_fmt % control_result['position_offset'],
+                    angle_fmt % control_result['angle_error'],
+                    size_fmt % (track_result['track_width'], track_result['track_length']),
+                    control_fmt % (control_result['lr'], control_result['fb'], control_result['yaw'])
+                ]
+                self._render_info_strip(self._cached_info_lines, contour_color, width)
+                self._prev_control_state = info_state
+            
+            y0 = self._info_strip_top
+            strip_region = annotated_frame[y0:y0 + self._info_strip.shape[0]]
+            np.copyto(strip_region, self._info_strip[:strip_region.shape[0]],
+                      where=self._info_strip_mask[:strip_region.shape[0]])
             
             # 显示运动趋势
             movement_trend = control_result.get("movement_trend", "unknown")
@@ -860,86 +1269,179 @@ class LineTrackModule:
             cv2.putText(annotated_frame, "SEARCHING MODE", 
                        (center_x-80, center_y+30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 165, 255), 2)
         
-        # 显示标题
-        cv2.putText(annotated_frame, "Optimized Line Tracking (linetrack3.py algorithm)", 
-                   (10, height-20), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 0), 1)
-        
         return annotated_frame
     
+    def _producer_loop(self):
+        """
+        采集线程：把最新视频帧写入单槽缓冲，未被取走的旧帧直接覆盖
+        """
+        last_frame = None
+        
+        while not self._pipeline_stop.is_set():
+            frame = self.frame_read.frame if self.frame_read else None
+            
+            if frame is not None and frame is not last_frame:
+                last_frame = frame
+                with self._frame_lock:
+                    self._latest_frame = frame
+                self._frame_ready.set()
+            
+            time.sleep(0.005)
+    
+    def _detector_loop(self):
+        """检测线程：从单槽缓冲取最新帧做轨迹检测，发布最新检测结果"""
+        while not self._pipeline_stop.is_set():
+            if not self._frame_ready.wait(timeout=0.1):
+                continue
+            
+            with self._frame_lock:
+                frame, self._latest_frame = self._latest_frame, None
+                self._frame_ready.clear()
+            
+            if frame is None:
+                continue
+            
+            try:
+                # 初始化暗角校正器
+                if self.vignette_corrector is None:
+                    self.vignette_corrector = VignetteCorrector(frame.shape, 0.4, self.crop_margin)
+                    print("✓ 暗角校正器已初始化")
+                
+                # 验证图像尺寸
+                validated_frame = self.validate_and_crop_frame(frame)
+                
+                if validated_frame is None:
+                    print("⚠ 图像验证失败，跳过本帧")
+                    continue
+                
+                # 如果图像被修正，记录日志
+                if validated_frame is not frame:
+                    print(f"📐 图像已修正: {frame.shape} -> {validated_frame.shape}")
+                
+                # 使用优化的轨迹检测（重复帧返回缓存结果）
+                track_result = self.detect_track(validated_frame)
+                
+                with self._result_lock:
+                    self._latest_result = (validated_frame, track_result)
+                    
+            except Exception as e:
+                print(f"巡线检测线程错误: {e}")
+    
     def tracking_worker(self):
-        """巡线工作线程 - 增强版本"""
+        """巡线控制线程 - 消费检测线程发布的最新结果，不阻塞在检测上"""
         print("🚁 巡线线程启动（采用linetrack3优化算法）")
         
+        last_result = None
+        next_tick = time.monotonic()
+        
         try:
             while self.is_tracking and self.tello_controller.connected:
-                # 获取当前帧
-                frame = None
-                if self.frame_read:
-                    frame = self.frame_read.frame
+                deadline = next_tick + self.tracking_period
                 
-                if frame is not None:
-                    # 初始化暗角校正器
-                    if self.vignette_corrector is None:
-                        self.vignette_corrector = VignetteCorrector(frame.shape, 0.4)
-                        print("✓ 暗角校正器已初始化")
+                with self._result_lock:
+                    latest = self._latest_result
+                
+                if latest is not None and latest[1] is not last_result:
+                    validated_frame, track_result = latest
+                    last_result = track_result
+                    # 检测线程每帧发布新的数组且不再修改，直接保存引用即可
+                    self.current_frame = validated_frame
                     
-                    # 验证图像尺寸
-                    original_shape = frame.shape
-                    validated_frame = self.validate_and_crop_frame(frame)
+                    # 使用增强的控制计算
+                    control_result = self.calculate_track_following_control(track_result)
                     
-                    if validated_frame is not None:
-                        self.current_frame = validated_frame.copy()
-                        
-                        # 如果图像被修正，记录日志
-                        if validated_frame.shape != original_shape:
-                            print(f"📐 图像已修正: {original_shape} -> {validated_frame.shape}")
-                        
-                        # 使用优化的轨迹检测
-                        track_result = self.detect_track_optimized(validated_frame)
-                        
-                        # 使用增强的控制计算
-                        control_result = self.calculate_track_following_control(track_result)
-                        
-                        # 增强的可视化
+                    # 增强的可视化（仅调试显示时绘制；已超出本周期截止时间则跳过，优先保证控制节拍）
+                    if self.debug_display and time.monotonic() < deadline:
                         annotated_frame = self.visualize_tracking(validated_frame, track_result, control_result)
-                        
-                        # 显示结果
-                        if annotated_frame is not None:
-                            cv2.imshow("Line Tracking", annotated_frame)
-                            
-                            # 显示二值化图像
-                            if "binary" in track_result:
-                                cv2.imshow("Track Binary", track_result["binary"])
-                            
-                            cv2.waitKey(1)
-                        
-                        # 更新状态
-                        with self.track_lock:
-                            self.track_detected = track_result["found"]
-                            self.control_mode = control_result["control_mode"]
-                            self.alignment_score = control_result["alignment_score"]
-                            
-                            if track_result["found"]:
-                                self.last_track_time = time.time()
-                        
-                        # 执行智能控制（仅在飞行时）
-                        if self.tello_controller.flying:
-                            try:
-                                self.execute_smart_tracking_control(control_result)
-                            except Exception as e:
-                                print(f"智能巡线控制发送失败: {e}")
                     else:
-                        print("⚠ 图像验证失败，跳过本帧")
+                        annotated_frame = None
+                    
+                    # 交给显示线程
+                    if annotated_frame is not None:
+                        self._post_display(annotated_frame, track_result.get("binary"))
+                    
+                    # 更新状态
+                    with self.track_lock:
+                        self.track_detected = track_result["found"]
+                        self.control_mode = control_result["control_mode"]
+                        self.alignment_score = control_result["alignment_score"]
+                        
+                        if track_result["found"]:
+                            self.last_track_time = time.time()
+                    
+                    # 执行智能控制（仅在飞行时）
+                    if self.tello_controller.flying:
+                        try:
+                            self.execute_smart_tracking_control(control_result)
+                        except Exception as e:
+                            print(f"智能巡线控制发送失败: {e}")
                 
-                time.sleep(0.033)  # 约30fps
+                # 按截止时间调度，周期不受处理耗时影响（约30fps）
+                next_tick = deadline
+                delay = next_tick - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    # 落后时不累积欠账，从当前时刻重新计时
+                    next_tick = time.monotonic()
                 
         except Exception as e:
             print(f"巡线线程错误: {e}")
             traceback.print_exc()
         finally:
+            self._pipeline_stop.set()
             print("🚁 巡线线程退出")
+    
+    def _post_display(self, annotated_frame, binary):
+        """投递待显示画面，队列满时丢弃未显示的旧画面"""
+        item = (annotated_frame, binary)
+        try:
+            self.display_queue.put_nowait(item)
+        except queue.Full:
+            try:
+                # 被丢弃的旧画面不会再显示，其缓冲区归还池中
+                self._viz_pool.put(self.display_queue.get_nowait()[0])
+            except queue.Empty:
+                pass
+            try:
+                self.display_queue.put_nowait(item)
+            except queue.Full:
+                pass
+    
+    def _display_loop(self):
+        """显示线程：负责所有HighGUI调用，避免imshow/waitKey阻塞控制周期"""
+        try:
+            while not self._pipeline_stop.is_set():
+                try:
+                    annotated_frame, binary = self.display_queue.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                
+                try:
+                    cv2.imshow("Line Tracking", annotated_frame)
+                    
+                    # 显示二值化图像
+                    if binary is not None:
+                        cv2.imshow("Track Binary", binary)
+                    
+                    cv2.waitKey(1)
+                except Exception as e:
+                    print(f"巡线显示线程错误: {e}")
+                finally:
+                    self._viz_pool.put(annotated_frame)
+        finally:
             cv2.destroyAllWindows()
     
+    def _warmup_jit(self):
+        """用哑数据调用一次数值内核，提前完成numba编译（未安装numba时开销可忽略）"""
+        try:
+            dummy = np.ones(1, dtype=np.float64)
+            score_tracks(dummy * 100, dummy * 5, dummy * 50, dummy, dummy)
+            _compute_alignment_score(160.0, 120.0, 160.0, 120.0, 0.0)
+            _predict_position(np.zeros(5, dtype=np.float32), np.zeros(5, dtype=np.float32), 0, 5, 3)
+        except Exception as e:
+            print(f"⚠ JIT预热失败: {e}")
+    
     def start_line_tracking(self):
         """启动巡线模式 - 增强版本"""
         if self.is_tracking:
@@ -975,7 +1477,7 @@ class LineTrackModule:
                         if stable_frames >= 3:
                             print(f"✓ 下视摄像头就绪，稳定分辨率: {validated_frame.shape}")
                             # 初始化暗角校正器
-                            self.vignette_corrector = VignetteCorrector(validated_frame.shape, 0.4)
+                            self.vignette_corrector = VignetteCorrector(validated_frame.shape, 0.4, self.crop_margin)
                             print("✓ 暗角校正器已初始化")
                             break
                     else:
@@ -985,6 +1487,27 @@ class LineTrackModule:
             else:
                 print("❌ 下视摄像头图像质量不稳定，但继续尝试启动")
             
+            # 预热JIT内核，避免首帧承担编译开销
+            self._warmup_jit()
+            
+            # 启动采集/检测流水线
+            self._pipeline_stop.clear()
+            self._latest_result = None
+            self._latest_frame = None
+            self._frame_ready.clear()
+            self._ewma_dt = 0.0
+            self.display_queue = queue.Queue(maxsize=1)
+            self.producer_thread = threading.Thread(target=self._producer_loop, daemon=True)
+            self.detector_thread = threading.Thread(target=self._detector_loop, daemon=True)
+            self.producer_thread.start()
+            self.detector_thread.start()
+            if self.debug_display:
+                self.display_thread = threading.Thread(target=self._display_loop, daemon=True)
+                self.display_thread.start()
+            else:
+                self.display_thread = None
+                print("ℹ 调试显示已关闭（设置 LINETRACK_DEBUG=1 可开启巡线画面）")
+            
             # 启动巡线线程
             self.is_tracking = True
             self.tracking_thread = threading.Thread(target=self.tracking_worker, daemon=True)
@@ -996,6 +1519,7 @@ class LineTrackModule:
         except Exception as e:
             print(f"❌ 启动巡线模式失败: {e}")
             self.is_tracking = False
+            self._pipeline_stop.set()
             return False
     
     def stop_line_tracking(self):
@@ -1015,11 +1539,11 @@ class LineTrackModule:
             pass
         
         # 等待线程结束
-        if self.tracking_thread:
-            self.tracking_thread.join(timeout=3)
-        
-        # 关闭窗口
-        cv2.destroyAllWindows()
+        self._pipeline_stop.set()
+        for thread in (self.tracking_thread, self.detector_thread, self.producer_thread,
+                       self.display_thread):
+            if thread:
+                thread.join(timeout=3)
         
         # 切换回前视摄像头
         try:
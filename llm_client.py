@@ -3,6 +3,12 @@ LLM API客户端
 """
 import requests
 import json
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    # orjson不可用时退化为标准库解析
+    json_loads = json.loads
 from config import API_BASE_URL, API_KEY, MODEL_NAME, SYSTEM_PROMPT, VISION_DESCRIPTION_PROMPT
 
 class LLMClient:
@@ -12,37 +18,73 @@ class LLMClient:
             "Authorization": f"Bearer {API_KEY}",
             "Content-Type": "application/json"
         }
+        
+        # 复用HTTP连接（keep-alive），避免每次请求重新建立TCP/TLS连接
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=4)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        
+        # 预编码固定的请求体骨架，每次请求只需编码用户文本
+        self._parse_template = self._encode_payload_template(
+            SYSTEM_PROMPT, temperature=0.1, max_tokens=200)
+        self._vision_template = self._encode_payload_template(
+            VISION_DESCRIPTION_PROMPT, temperature=0.3, max_tokens=100)
+    
+    @staticmethod
+    def _encode_payload_template(system_prompt, **options):
+        """
+        把除用户文本外的请求体预先编码为字节
+        
+        Returns:
+            (prefix, suffix): 用户文本的JSON字符串编码夹在两者之间即为完整请求体
+        """
+        marker = "__USER_CONTENT__"
+        payload = {
+            "model": MODEL_NAME,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": marker}
+            ],
+            **options
+        }
+        prefix, suffix = json.dumps(payload).encode('utf-8').split(json.dumps(marker).encode('utf-8'))
+        return prefix, suffix
+    
+    @staticmethod
+    def _fill_payload(template, user_text):
+        """用预编码骨架拼出完整请求体"""
+        prefix, suffix = template
+        return prefix + json.dumps(user_text).encode('utf-8') + suffix
     
     def parse_voice_command(self, voice_text):
         """
         使用LLM解析语音命令，支持复合指令
+        
+        等待完整回复后一次性解析：流式回复中途断开时只会得到部分指令，
+        执行这样的前缀（如只有"前进"没有"降落"）比整句丢弃更危险
+        
+        Returns:
+            list: 指令列表；解析失败时为 ["unknown"]
         """
         try:
-            payload = {
-                "model": MODEL_NAME,
-                "messages": [
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {"role": "user", "content": voice_text}
-                ],
-                "temperature": 0.1,
-                "max_tokens": 200
-            }
+            body = self._fill_payload(self._parse_template, voice_text)
             
-            response = requests.post(
-                self.api_url, 
-                headers=self.headers, 
-                json=payload, 
+            response = self.session.post(
+                self.api_url,
+                data=body,
                 timeout=10
             )
             
             if response.status_code == 200:
-                result = response.json()
+                result = json_loads(response.content)
                 content = result['choices'][0]['message']['content'].strip()
                 
                 # 解析复合指令（以分号分隔）
                 commands = [cmd.strip() for cmd in content.split(';') if cmd.strip()]
                 print(f"🤖 LLM解析结果: {commands}")
-                return commands
+                return commands or ["unknown"]
             else:
                 print(f"❌ LLM API错误: {response.status_code}")
                 return ["unknown"]
@@ -59,25 +101,16 @@ class LLMClient:
             # 将识别结果格式化为输入文本
             input_text = str(recognition_result)
             
-            payload = {
-                "model": MODEL_NAME,
-                "messages": [
-                    {"role": "system", "content": VISION_DESCRIPTION_PROMPT},
-                    {"role": "user", "content": input_text}
-                ],
-                "temperature": 0.3,
-                "max_tokens": 100
-            }
+            body = self._fill_payload(self._vision_template, input_text)
             
-            response = requests.post(
+            response = self.session.post(
                 self.api_url,
-                headers=self.headers,
-                json=payload,
+                data=body,
                 timeout=8
             )
             
             if response.status_code == 200:
-                result = response.json()
+                result = json_loads(response.content)
                 description = result['choices'][0]['message']['content'].strip()
                 print(f"🤖 生成描述: {description}")
                 return description
@@ -102,9 +135,8 @@ class LLMClient:
                 "max_tokens": 10
             }
             
-            response = requests.post(
+            response = self.session.post(
                 self.api_url,
-                headers=self.headers,
                 json=test_payload,
                 timeout=5
             )
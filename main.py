@@ -1,10 +1,32 @@
 import time
+import queue
+import threading
+import concurrent.futures
+import traceback
+try:
+    import msvcrt
+except ImportError:
+    # 非Windows平台无msvcrt，不读取控制台按键
+    msvcrt = None
+try:
+    from voice_ui import VoiceControlUI
+except ImportError:
+    # 未安装tkinter时只能使用控制台模式
+    VoiceControlUI = None
 from voice_controller import VoiceController
 from llm_client import LLMClient
 from network_manager import NetworkChecker
 from tello_extended_controller import TelloExtendedController
 from command_queue_manager import CommandQueueManager
 
+# Windows控制台等待相关常量
+STD_INPUT_HANDLE = -10 & 0xFFFFFFFF
+WAIT_OBJECT_0 = 0
+
+# 控制台主循环在事件队列上的最长阻塞时间（秒）
+# 事件到达时立即唤醒，超时只用于响应Ctrl+C（Windows下带超时的锁等待不可被信号中断）
+CONSOLE_EVENT_TIMEOUT = 1.0
+
 class TelloVoiceControl:
     def __init__(self):
         self.llm_client = LLMClient()
@@ -22,9 +44,14 @@ class TelloVoiceControl:
         print("=== Tello编队语音控制系统初始化 ===")
         print("注意：使用编队模式，保持互联网连接")
         
-        # 1. 确认网络连接（保持互联网连接用于API调用）
+        # 1-3. 网络、LLM、语音识别三项检测互不依赖，并发执行
         print("1. 检查网络连接...")
-        if self.network_checker.check_internet_connection():
+        print("2. 测试LLM API连接...")
+        print("3. 测试百度语音识别...")
+        internet_ok, llm_ok, voice_ok, current_wifi = self._run_startup_checks()
+        
+        # 1. 确认网络连接（保持互联网连接用于API调用）
+        if internet_ok:
             print("✓ 互联网连接正常，可以使用API服务")
         else:
             print("✗ 互联网连接异常，将影响语音识别和LLM功能")
@@ -32,19 +59,16 @@ class TelloVoiceControl:
             if choice.lower() != 'y':
                 return False
         
-        current_wifi = self.network_checker.get_current_wifi()
         print(f"当前WiFi: {current_wifi}")
         
-        # 2. 测试LLM连接
-        print("2. 测试LLM API连接...")
-        if self.llm_client.test_connection():
+        # 2. LLM连接
+        if llm_ok:
             print("✓ LLM API连接正常")
         else:
             print("✗ LLM API连接失败，将使用离线模式")
         
-        # 3. 测试语音识别
-        print("3. 测试百度语音识别...")
-        if self.voice_controller.test_voice_recognition():
+        # 3. 语音识别
+        if voice_ok:
             print("✓ 百度语音识别正常")
         else:
             print("✗ 百度语音识别失败，请检查麦克风和网络")
@@ -61,6 +85,20 @@ class TelloVoiceControl:
         print("=== 编队语音控制系统初始化完成 ===\n")
         return True
     
+    def _run_startup_checks(self):
+        """
+        在线程池中并发执行启动检测，总耗时取决于最慢的一项而不是各项之和
+        
+        Returns:
+            (internet_ok, llm_ok, voice_ok, current_wifi)
+        """
+        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+            f_net = executor.submit(self.network_checker.check_internet_connection)
+            f_llm = executor.submit(self.llm_client.test_connection)
+            f_voice = executor.submit(self.voice_controller.test_voice_recognition)
+            f_wifi = executor.submit(self.network_checker.get_current_wifi)
+            return f_net.result(), f_llm.result(), f_voice.result(), f_wifi.result()
+    
     def execute_command(self, commands):
         """执行语音命令（委托给队列管理器）"""
         if self.queue_manager:
@@ -122,16 +160,19 @@ class TelloVoiceControl:
                 
         except Exception as e:
             print(f"❌ 运行时错误: {e}")
-            import traceback
             traceback.print_exc()
         finally:
             self.shutdown()
     
     def run_with_ui(self):
         """使用图形界面运行"""
+        if VoiceControlUI is None:
+            print("❌ 无法导入UI模块，请检查是否安装了tkinter")
+            print("回退到控制台模式...")
+            self.run_console_mode()
+            return
+        
         try:
-            from voice_ui import VoiceControlUI
-            
             print("🚀 启动图形界面...")
             
             # 启动语音监听（不使用键盘钩子）
@@ -141,10 +182,6 @@ class TelloVoiceControl:
             ui = VoiceControlUI(self.voice_controller, self)
             ui.run()
             
-        except ImportError:
-            print("❌ 无法导入UI模块，请检查是否安装了tkinter")
-            print("回退到控制台模式...")
-            self.run_console_mode()
         except Exception as e:
             print(f"❌ UI启动失败: {e}")
             print("回退到控制台模式...")
@@ -169,84 +206,145 @@ class TelloVoiceControl:
         # 启动语音监听（在后台线程中运行）
         voice_thread = self.voice_controller.start_listening()
         
-        # 主控制循环 - 简化为轮询模式
+        # 主控制循环 - 语音指令与控制台按键统一投递到同一个队列，主线程只阻塞在该队列上
+        event_queue = self.voice_controller.command_queue
+        key_thread = threading.Thread(target=self._console_input_worker, args=(event_queue,), daemon=True)
+        key_thread.start()
+        
         try:
-            last_check_time = time.time()
-            
             while self.running:
-                # 检查语音命令队列
-                commands = self.voice_controller.get_command()
-                if commands:
-                    print(f"🎯 收到语音指令: {commands}")
-                    success = self.execute_command(commands)
-                    if not success:
-                        self.voice_controller.speak("指令执行失败")
+                try:
+                    event = event_queue.get(timeout=CONSOLE_EVENT_TIMEOUT)
+                except queue.Empty:
+                    continue
                 
-                # 每秒检查一次用户输入（非阻塞方式）
-                current_time = time.time()
-                if current_time - last_check_time >= 1.0:
-                    last_check_time = current_time
-                    
-                    # 提示用户可以输入命令
-                    try:
-                        import msvcrt
-                        if msvcrt.kbhit():
-                            user_input = input("\n请输入命令 (s=状态, c=巡航, l=巡线, x=停止所有模式, q=退出): ").strip().lower()
-                            if user_input == 's':
-                                status = self.get_status()
-                                print(f"📊 当前状态: {status}")
-                                queue_size = self.get_queue_status()
-                                if queue_size > 0:
-                                    print(f"📋 队列中还有 {queue_size} 条指令等待执行")
-                            
-                            elif user_input == 'c':
-                                # 开始巡航
-                                if self.tello_controller.flying:
-                                    success = self.execute_command("start_cruise")
-                                    if not success:
-                                        print("❌ 启动巡航失败")
-                                else:
-                                    print("⚠ 无人机未在飞行中，无法开始巡航")
-                            
-                            elif user_input == 'l':
-                                # 开始巡线
-                                if self.tello_controller.flying:
-                                    success = self.execute_command("start_linetrack")
-                                    if not success:
-                                        print("❌ 启动巡线失败")
-                                else:
-                                    print("⚠ 无人机未在飞行中，无法开始巡线")
-                            
-                            elif user_input == 'x':
-                                # 停止所有模式
-                                success1 = self.execute_command("stop_cruise")
-                                success2 = self.execute_command("stop_linetrack")
-                                if success1 or success2:
-                                    print("✓ 已停止所有自动模式")
-                                else:
-                                    print("❌ 停止模式失败")
-                            
-                            elif user_input == 'q':
-                                print("🛑 退出系统")
-                                self.running = False
-                                break
-                            
-                            elif user_input == 'v':
-                                # 手动切换语音模式
-                                self.voice_controller.toggle_voice_mode()
-                            
-                            elif user_input != '':
-                                print("❌ 无效输入，请输入 's', 'c', 'l', 'x', 'v' 或 'q'")
-                    except:
-                        # 如果 msvcrt 不可用，使用简单轮询
-                        pass
+                # 控制台按键事件: ('key', 输入文本)
+                if isinstance(event, tuple) and event and event[0] == 'key':
+                    self._handle_console_input(event[1])
+                    continue
                 
-                time.sleep(0.1)  # 避免CPU占用过高
+                # 语音指令
+                print(f"🎯 收到语音指令: {event}")
+                success = self.execute_command(event)
+                if not success:
+                    self.voice_controller.speak("指令执行失败")
                     
         except KeyboardInterrupt:
             print("\n🛑 收到Ctrl+C信号，正在退出...")
             self.running = False
     
+    def _console_input_worker(self, event_queue):
+        """按键线程：阻塞等待控制台按键，读到的输入以 ('key', 文本) 投递到事件队列"""
+        self._init_console_wait()
+        while self.running:
+            if not self._wait_for_key(200):
+                continue
+            try:
+                user_input = input("\n请输入命令 (s=状态, c=巡航, l=巡线, x=停止所有模式, q=退出): ").strip().lower()
+            except (EOFError, OSError):
+                break
+            event_queue.put(('key', user_input))
+    
+    def _init_console_wait(self):
+        """获取并缓存控制台标准输入句柄（仅Windows），失败时回退到kbhit轮询"""
+        self._kernel32 = None
+        self._stdin_handle = None
+        try:
+            import ctypes
+            from ctypes import wintypes
+            
+            kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+            kernel32.GetStdHandle.restype = wintypes.HANDLE
+            kernel32.GetStdHandle.argtypes = [wintypes.DWORD]
+            kernel32.WaitForSingleObject.restype = wintypes.DWORD
+            kernel32.WaitForSingleObject.argtypes = [wintypes.HANDLE, wintypes.DWORD]
+            kernel32.FlushConsoleInputBuffer.argtypes = [wintypes.HANDLE]
+            
+            invalid_handle = ctypes.c_void_p(-1).value  # INVALID_HANDLE_VALUE
+            handle = kernel32.GetStdHandle(STD_INPUT_HANDLE)
+            if handle and handle != invalid_handle:
+                self._kernel32 = kernel32
+                self._stdin_handle = handle
+        except (AttributeError, OSError, ImportError):
+            # 非Windows平台或无控制台
+            pass
+    
+    def _wait_for_key(self, timeout_ms=200):
+        """
+        等待控制台按键，最多阻塞timeout_ms毫秒
+        
+        Returns:
+            bool: 有按键可读时返回True
+        """
+        if msvcrt is None:
+            # msvcrt不可用（非Windows），不读取控制台输入
+            time.sleep(timeout_ms / 1000.0)
+            return False
+        
+        if self._stdin_handle is None:
+            # 句柄不可用时回退到kbhit轮询
+            if msvcrt.kbhit():
+                return True
+            time.sleep(timeout_ms / 1000.0)
+            return False
+        
+        if self._kernel32.WaitForSingleObject(self._stdin_handle, timeout_ms) != WAIT_OBJECT_0:
+            return False
+        
+        if msvcrt.kbhit():
+            return True
+        
+        # 句柄被鼠标/焦点等非按键事件唤醒，清掉这些事件避免反复立即返回
+        self._kernel32.FlushConsoleInputBuffer(self._stdin_handle)
+        return False
+    
+    def _handle_console_input(self, user_input):
+        """处理控制台输入的单条命令"""
+        if user_input == 's':
+            status = self.get_status()
+            print(f"📊 当前状态: {status}")
+            queue_size = self.get_queue_status()
+            if queue_size > 0:
+                print(f"📋 队列中还有 {queue_size} 条指令等待执行")
+        
+        elif user_input == 'c':
+            # 开始巡航
+            if self.tello_controller.flying:
+                success = self.execute_command("start_cruise")
+                if not success:
+                    print("❌ 启动巡航失败")
+            else:
+                print("⚠ 无人机未在飞行中，无法开始巡航")
+        
+        elif user_input == 'l':
+            # 开始巡线
+            if self.tello_controller.flying:
+                success = self.execute_command("start_linetrack")
+                if not success:
+                    print("❌ 启动巡线失败")
+            else:
+                print("⚠ 无人机未在飞行中，无法开始巡线")
+        
+        elif user_input == 'x':
+            # 停止所有模式
+            success1 = self.execute_command("stop_cruise")
+            success2 = self.execute_command("stop_linetrack")
+            if success1 or success2:
+                print("✓ 已停止所有自动模式")
+            else:
+                print("❌ 停止模式失败")
+        
+        elif user_input == 'q':
+            print("🛑 退出系统")
+            self.running = False
+        
+        elif user_input == 'v':
+            # 手动切换语音模式
+            self.voice_controller.toggle_voice_mode()
+        
+        elif user_input != '':
+            print("❌ 无效输入，请输入 's', 'c', 'l', 'x', 'v' 或 'q'")
+    
     def shutdown(self):
         """安全关闭编队语音控制系统"""
         print("\n🔄 正在关闭编队语音控制系统...")
@@ -2,12 +2,94 @@
 网络管理器 - 处理网络切换和代理
 """
 import subprocess
+import sys
+import re
 import time
 import threading
 import requests
 import socket
+import select
 from config import PROXY_ENABLED, PROXY_HOST, PROXY_PORT
 
+# Windows下子进程不分配控制台窗口（CREATE_NO_WINDOW），避免pythonw界面闪烁
+_NO_WINDOW = 0x08000000 if sys.platform == 'win32' else 0
+
+def _run(cmd, encoding=None, **kwargs):
+    """执行外部命令并捕获文本输出，不创建控制台窗口、不继承标准输入"""
+    return subprocess.run(list(cmd), capture_output=True, text=True, encoding=encoding,
+                          creationflags=_NO_WINDOW, stdin=subprocess.DEVNULL, **kwargs)
+
+# 互联网连通性检测共用的HTTP会话（keep-alive连接复用）
+_NET_SESSION = requests.Session()
+_NET_SESSION.mount('http://', requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=2))
+INTERNET_CHECK_URL = 'http://www.baidu.com'
+
+def _probe_internet(timeout):
+    """用HEAD请求探测互联网连通性，只传输响应头"""
+    response = _NET_SESSION.head(INTERNET_CHECK_URL, timeout=timeout, allow_redirects=False)
+    return response.status_code < 400
+
+# Tello连通性探测共用的UDP套接字（惰性创建，非阻塞 + select 实现超时）
+TELLO_ADDRESS = ('192.168.10.1', 8889)
+_tello_probe_sock = None
+_tello_probe_lock = threading.Lock()
+
+def _probe_tello(timeout):
+    """向Tello发送 command 并等待应答，返回应答字节；超时返回None"""
+    global _tello_probe_sock
+    with _tello_probe_lock:
+        if _tello_probe_sock is None:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setblocking(False)
+            sock.bind(('', 0))
+            _tello_probe_sock = sock
+        sock = _tello_probe_sock
+        
+        # 丢弃上次超时后才到达的残留应答
+        while select.select([sock], [], [], 0)[0]:
+            try:
+                sock.recv(1024)
+            except OSError:
+                break
+        
+        sock.sendto(b'command', TELLO_ADDRESS)
+        readable, _, _ = select.select([sock], [], [], timeout)
+        if not readable:
+            return None
+        return sock.recv(1024)
+
+# netsh wlan show networks 输出中的 "SSID 1 : 名称" 行
+SSID_LINE_RE = re.compile(r'^\s*SSID\s+\d+\s*:\s*(.+?)\s*$', re.IGNORECASE | re.MULTILINE)
+# Tello/RMTT网络名称
+TELLO_SSID_RE = re.compile(r'tello|rmtt', re.IGNORECASE)
+# netsh wlan show interfaces 输出中当前连接的 "SSID : 名称" 行（不匹配BSSID行）
+CURRENT_SSID_RE = re.compile(r'^\s*SSID\s*:\s*(.*?)\s*$', re.MULTILINE)
+# route print 输出中的默认路由行：目标 0.0.0.0、掩码 0.0.0.0，第三列为网关
+DEFAULT_ROUTE_RE = re.compile(r'^\s*0\.0\.0\.0\s+0\.0\.0\.0\s+(\S+)', re.MULTILINE)
+
+# 查询类命令（netsh/ipconfig）输出缓存，避免短时间内重复创建进程
+COMMAND_CACHE_TTL = 2.0
+_command_cache = {}
+_command_cache_lock = threading.Lock()
+
+def _cached_command_output(cmd, encoding=None, ttl=COMMAND_CACHE_TTL):
+    """执行只读查询命令并返回stdout，ttl秒内的重复调用直接返回缓存结果"""
+    key = (tuple(cmd), encoding)
+    with _command_cache_lock:
+        entry = _command_cache.get(key)
+        if entry is not None and time.monotonic() - entry[0] < ttl:
+            return entry[1]
+    
+    result = _run(cmd, encoding=encoding)
+    with _command_cache_lock:
+        _command_cache[key] = (time.monotonic(), result.stdout)
+    return result.stdout
+
+def _invalidate_command_cache():
+    """网络状态改变后清空查询缓存"""
+    with _command_cache_lock:
+        _command_cache.clear()
+
 class NetworkManager:
     def __init__(self):
         self.original_default_gateway = None
@@ -16,8 +98,7 @@ class NetworkManager:
     def get_network_info(self):
         """获取当前网络信息"""
         try:
-            result = subprocess.run(['ipconfig'], capture_output=True, text=True, encoding='gbk')
-            return result.stdout
+            return _cached_command_output(('ipconfig',), encoding='gbk')
         except:
             return ""
     
@@ -25,16 +106,11 @@ class NetworkManager:
         """备份当前网络配置"""
         try:
             # 获取默认网关
-            result = subprocess.run(['route', 'print', '0.0.0.0'], 
-                                  capture_output=True, text=True)
-            lines = result.stdout.split('\n')
-            for line in lines:
-                if '0.0.0.0' in line and '0.0.0.0' in line:
-                    parts = line.split()
-                    if len(parts) >= 3:
-                        self.original_default_gateway = parts[2]
-                        print(f"备份原始网关: {self.original_default_gateway}")
-                        break
+            result = _run(['route', 'print', '0.0.0.0'])
+            match = DEFAULT_ROUTE_RE.search(result.stdout)
+            if match:
+                self.original_default_gateway = match.group(1)
+                print(f"备份原始网关: {self.original_default_gateway}")
         except Exception as e:
             print(f"备份网络配置失败: {e}")
     
@@ -52,9 +128,8 @@ class NetworkManager:
             network_name = tello_networks[0]
             print(f"正在连接到Tello网络: {network_name}")
             
-            result = subprocess.run([
-                'netsh', 'wlan', 'connect', f'name={network_name}'
-            ], capture_output=True, text=True)
+            result = _run(['netsh', 'wlan', 'connect', f'name={network_name}'])
+            _invalidate_command_cache()
             
             if result.returncode == 0:
                 print(f"已连接到Tello网络: {network_name}")
@@ -72,21 +147,16 @@ class NetworkManager:
     def find_tello_networks(self):
         """查找可用的Tello网络"""
         try:
-            # 刷新网络列表
-            subprocess.run(['netsh', 'wlan', 'show', 'networks'], 
-                          capture_output=True, text=True)
-            
-            result = subprocess.run(['netsh', 'wlan', 'show', 'networks'], 
-                                  capture_output=True, text=True)
-            lines = result.stdout.split('\n')
+            # 单次查询即可拿到完整扫描结果（mode=bssid 会列出驱动当前可见的全部网络），
+            # 无需先额外调用一次"刷新"；BSSID行不会被 SSID_LINE_RE 匹配
+            output = _cached_command_output(('netsh', 'wlan', 'show', 'networks', 'mode=bssid'))
             tello_networks = []
             
-            for line in lines:
-                if 'SSID' in line and ('Tello' in line.upper() or 'RMTT' in line.upper()):
-                    # 提取SSID名称
-                    ssid = line.split(':')[-1].strip()
-                    if ssid:
-                        tello_networks.append(ssid)
+            # 直接在输出上逐个匹配 "SSID n : 名称" 行，不拆分整段文本
+            for match in SSID_LINE_RE.finditer(output):
+                ssid = match.group(1)
+                if TELLO_SSID_RE.search(ssid):
+                    tello_networks.append(ssid)
             
             print(f"找到Tello网络: {tello_networks}")
             return tello_networks
@@ -99,12 +169,8 @@ class NetworkManager:
         """测试Tello连接"""
         try:
             # 尝试连接Tello的UDP端口
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.settimeout(3)
-            sock.sendto(b'command', ('192.168.10.1', 8889))
-            response = sock.recv(1024)
-            sock.close()
-            return b'ok' in response.lower()
+            response = _probe_tello(timeout=3)
+            return response is not None and b'ok' in response.lower()
         except:
             return False
     
@@ -153,8 +219,7 @@ class DualNetworkManager:
     def test_internet_connection(self):
         """测试互联网连接"""
         try:
-            response = requests.get('http://www.baidu.com', timeout=5)
-            return response.status_code == 200
+            return _probe_internet(timeout=5)
         except:
             return False
     
@@ -163,9 +228,7 @@ class DualNetworkManager:
         try:
             print("配置网络路由...")
             # 设置Tello网络的特定路由
-            subprocess.run([
-                'route', 'add', '192.168.10.0', 'mask', '255.255.255.0', '192.168.10.1', 'metric', '1'
-            ], capture_output=True)
+            _run(['route', 'add', '192.168.10.0', 'mask', '255.255.255.0', '192.168.10.1', 'metric', '1'])
             
             print("网络路由配置完成")
             return True
@@ -181,12 +244,7 @@ class NetworkChecker:
     def check_tello_connection():
         """检查Tello连接状态"""
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.settimeout(2)
-            sock.sendto(b'command', ('192.168.10.1', 8889))
-            response = sock.recv(1024)
-            sock.close()
-            return True
+            return _probe_tello(timeout=2) is not None
         except:
             return False
     
@@ -194,8 +252,7 @@ class NetworkChecker:
     def check_internet_connection():
         """检查互联网连接状态"""
         try:
-            response = requests.get('http://www.baidu.com', timeout=3)
-            return response.status_code == 200
+            return _probe_internet(timeout=3)
         except:
             return False
     
@@ -203,12 +260,10 @@ class NetworkChecker:
     def get_current_wifi():
         """获取当前连接的WiFi"""
         try:
-            result = subprocess.run(['netsh', 'wlan', 'show', 'interfaces'], 
-                                  capture_output=True, text=True, encoding='gbk')
-            lines = result.stdout.split('\n')
-            for line in lines:
-                if 'SSID' in line and ':' in line:
-                    return line.split(':')[-1].strip()
+            output = _cached_command_output(('netsh', 'wlan', 'show', 'interfaces'), encoding='gbk')
+            match = CURRENT_SSID_RE.search(output)
+            if match:
+                return match.group(1)
             return "未知"
         except:
             return "未知"
\ No newline at end of file
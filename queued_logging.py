@@ -0,0 +1,55 @@
+"""
+队列日志 - 日志记录经队列交给监听线程写出，调用线程不做同步stdout刷新
+
+各模块用 get_queued_logger 取得日志器（导入时不启动线程）；
+应用入口调用一次 start_log_listener，退出时调用 stop_log_listener。
+监听线程未运行时日志直接同步写出，不会丢失也不会在队列中堆积
+"""
+import sys
+import queue
+import logging
+import logging.handlers
+
+_log_queue = queue.Queue(-1)
+_log_listener = None
+
+
+class _QueueOrDirectHandler(logging.handlers.QueueHandler):
+    """监听线程运行时把日志放入队列，否则直接写到stdout"""
+    
+    def __init__(self):
+        super().__init__(_log_queue)
+        self._direct = logging.StreamHandler(sys.stdout)
+    
+    def emit(self, record):
+        if _log_listener is None:
+            self._direct.handle(record)
+        else:
+            super().emit(record)
+
+
+def get_queued_logger(name):
+    """返回写入共享日志队列的日志器（INFO级，不向根日志器传播）"""
+    logger = logging.getLogger(name)
+    if not any(isinstance(h, _QueueOrDirectHandler) for h in logger.handlers):
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        logger.addHandler(_QueueOrDirectHandler())
+    return logger
+
+
+def start_log_listener():
+    """启动写出队列日志的监听线程（重复调用无副作用）"""
+    global _log_listener
+    if _log_listener is None:
+        _log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler(sys.stdout))
+        _log_listener.start()
+
+
+def stop_log_listener():
+    """停止监听线程，写出队列中剩余的日志"""
+    global _log_listener
+    listener, _log_listener = _log_listener, None
+    if listener is not None:
+        # 先切回直接写出，再等监听线程写完已入队的日志
+        listener.stop()
@@ -5,15 +5,25 @@ import pyttsx3
 import threading
 import queue
 import time
+import itertools
+import logging
 from config import TTS_ENABLED, TTS_VOICE_ID, TTS_RATE, TTS_VOLUME
 
+# 每句播报的入队/播放日志走DEBUG级别，未开启时不格式化、不写stdout
+tts_logger = logging.getLogger("speech_synthesis")
+
 class SpeechSynthesis:
     def __init__(self):
         self.enabled = TTS_ENABLED
         self.engine = None
-        self.speaking_queue = queue.Queue()
+        # 优先级队列：元素为 (优先级, 序号, 文本)，优先级0先播报，同级按加入顺序
+        self.speaking_queue = queue.PriorityQueue()
+        self._seq = itertools.count()
         self.speaking_thread = None
         self.speaking_running = False
+        # 引擎保持外部事件循环（startLoop(False)），由iterate()驱动，say/iterate需互斥
+        self._engine_lock = threading.Lock()
+        self._loop_started = False
         
         # 初始化TTS引擎
         self._init_tts_engine()
@@ -40,6 +50,10 @@ class SpeechSynthesis:
             self.engine.setProperty('rate', TTS_RATE)
             self.engine.setProperty('volume', TTS_VOLUME)
             
+            # 启动常驻的外部驱动事件循环，避免每句话runAndWait重建COM事件循环
+            self.engine.startLoop(False)
+            self._loop_started = True
+            
             print(f"✅ 语音合成引擎初始化成功")
             print(f"   语音速度: {TTS_RATE}")
             print(f"   音量: {TTS_VOLUME}")
@@ -60,25 +74,11 @@ class SpeechSynthesis:
             return
         
         try:
+            self.speaking_queue.put((0 if priority else 1, next(self._seq), text))
             if priority:
-                # 优先播报，插入队列头部
-                temp_queue = queue.Queue()
-                temp_queue.put(text)
-                
-                # 将原队列内容放到临时队列后面
-                while not self.speaking_queue.empty():
-                    try:
-                        item = self.speaking_queue.get_nowait()
-                        temp_queue.put(item)
-                    except queue.Empty:
-                        break
-                
-                # 替换原队列
-                self.speaking_queue = temp_queue
-                print(f"🔊 优先语音播报: {text}")
+                tts_logger.debug("🔊 优先语音播报: %s", text)
             else:
-                self.speaking_queue.put(text)
-                print(f"🔊 添加语音播报: {text}")
+                tts_logger.debug("🔊 添加语音播报: %s", text)
                 
         except Exception as e:
             print(f"❌ 添加语音播报失败: {e}")
@@ -89,9 +89,10 @@ class SpeechSynthesis:
             return
         
         try:
-            print(f"🔊 立即播报: {text}")
-            self.engine.say(text)
-            self.engine.runAndWait()
+            tts_logger.debug("🔊 立即播报: %s", text)
+            with self._engine_lock:
+                self.engine.say(text)
+                self._drive_engine(lambda: True)
         except Exception as e:
             print(f"❌ 立即播报失败: {e}")
     
@@ -118,17 +119,36 @@ class SpeechSynthesis:
         
         print("✅ 语音播报服务已停止")
     
+    def _drive_engine(self, keep_running):
+        """驱动引擎事件循环直到当前所有语句播报完毕"""
+        if not self._loop_started:
+            self.engine.runAndWait()
+            return
+        
+        self.engine.iterate()
+        while self.engine.isBusy() and keep_running():
+            self.engine.iterate()
+            time.sleep(0.02)
+    
     def _speaking_worker(self):
         """语音播报工作线程"""
         while self.speaking_running:
             try:
-                # 从队列获取文本（阻塞式，超时1秒）
-                text = self.speaking_queue.get(timeout=1)
+                # 从队列获取文本（阻塞式，超时1秒），再非阻塞取出已排队的其余文本
+                texts = [self.speaking_queue.get(timeout=1)[2]]
+                while True:
+                    try:
+                        texts.append(self.speaking_queue.get_nowait()[2])
+                    except queue.Empty:
+                        break
                 
-                if text and self.enabled and self.engine:
-                    print(f"🔊 正在播报: {text}")
-                    self.engine.say(text)
-                    self.engine.runAndWait()
+                if self.enabled and self.engine:
+                    with self._engine_lock:
+                        for text in texts:
+                            if text:
+                                tts_logger.debug("🔊 正在播报: %s", text)
+                                self.engine.say(text)
+                        self._drive_engine(lambda: self.speaking_running)
                     
             except queue.Empty:
                 continue
@@ -140,13 +160,23 @@ class SpeechSynthesis:
     
     def clear_queue(self):
         """清空语音播报队列"""
-        cleared_count = 0
-        while not self.speaking_queue.empty():
-            try:
-                self.speaking_queue.get_nowait()
-                cleared_count += 1
-            except queue.Empty:
-                break
+        q = self.speaking_queue
+        if hasattr(q, 'queue'):
+            # 持有队列内部锁一次性清空底层容器（PriorityQueue为堆列表，可直接clear）
+            with q.mutex:
+                cleared_count = len(q.queue)
+                q.queue.clear()
+                q.unfinished_tasks = 0
+                q.all_tasks_done.notify_all()
+                q.not_full.notify_all()
+        else:
+            cleared_count = 0
+            while True:
+                try:
+                    q.get_nowait()
+                    cleared_count += 1
+                except queue.Empty:
+                    break
         
         if cleared_count > 0:
             print(f"🔊 已清空 {cleared_count} 条语音播报")
@@ -213,6 +243,12 @@ class SpeechSynthesis:
                     self.engine.stop()
                 except:
                     pass
+                if self._loop_started:
+                    try:
+                        self.engine.endLoop()
+                    except:
+                        pass
+                    self._loop_started = False
             
             print("✅ 语音合成服务已关闭")
             
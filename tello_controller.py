@@ -3,22 +3,136 @@ Tello无人机控制器
 """
 from djitellopy import Tello
 import cv2
+import numpy as np
 import threading
 import time
+import re
+import functools
 from config import TELLO_IP
+from queued_logging import get_queued_logger
+
+# 指令执行日志 - 经队列交给监听线程写出，调用线程不做同步stdout刷新
+tello_logger = get_queued_logger("tello_controller")
+
+# 视频UDP接收缓冲（FFmpeg udp协议的buffer_size即SO_RCVBUF），码率突发时减少H.264丢包
+VIDEO_UDP_BUFFER_SIZE = 4 * 1024 * 1024
+
+# 视频流诊断状态快照的有效期（秒）
+DIAG_CACHE_TTL = 0.25
+
+# 硬件H.264解码的GStreamer管线，均不可用时退回djitellopy软件解码
+# 按顺序尝试 (解码器, 转换到系统内存BGR的元素)：VAAPI（Intel/AMD）、Jetson V4L2解码、桌面NVIDIA nvcodec
+VIDEO_GST_DECODERS = (
+    ("vaapih264dec", "videoconvert"),
+    ("nvv4l2decoder", "nvvidconv ! video/x-raw,format=BGRx ! videoconvert"),
+    ("nvh264dec", "videoconvert"),
+)
+# Tello视频是UDP 11111端口上的裸H.264码流（非RTP），udpsrc需显式声明caps才能与h264parse协商
+VIDEO_GST_PIPELINE = (
+    'udpsrc port=11111 buffer-size={buffer_size} caps="video/x-h264,stream-format=byte-stream" ! '
+    "h264parse ! {decoder} ! {convert} ! video/x-raw,format=BGR ! appsink drop=true max-buffers=1 sync=false"
+)
+# 管线打开后等待首帧的最长时间（秒），超时视为协商失败，换下一个解码器
+VIDEO_GST_FIRST_FRAME_TIMEOUT = 3.0
+
+
+class BufferedVideoTello(Tello):
+    """
+    视频地址附加 buffer_size 参数的Tello，让djitellopy的帧读取器以更大的UDP接收缓冲打开视频流
+    
+    djitellopy 的解码器（OpenCV/PyAV，均基于FFmpeg）自行创建视频套接字，无法直接setsockopt
+    """
+    
+    def get_udp_video_address(self):
+        address = super().get_udp_video_address()
+        separator = '&' if '?' in address else '?'
+        return f"{address}{separator}buffer_size={VIDEO_UDP_BUFFER_SIZE}&overrun_nonfatal=1"
+
+
+class GstFrameReader:
+    """
+    GStreamer硬件解码帧读取器，接口与djitellopy的BackgroundFrameRead一致（.frame / .stop()）
+    
+    读取线程每帧由OpenCV新分配数组，只把最新一帧的引用赋给 self.frame；
+    已发布的帧不会再被写入，消费者可长期持有而不必复制
+    """
+    
+    def __init__(self, capture):
+        self.capture = capture
+        self.frame = None
+        self.stopped = False
+        self._first_frame = threading.Event()
+        self.worker = threading.Thread(target=self._read_loop, daemon=True)
+        self.worker.start()
+    
+    @classmethod
+    def open(cls):
+        """
+        依次尝试各硬件解码器，返回已解出首帧的读取器
+        
+        OpenCV未编译GStreamer支持、管线打不开或超时仍未解出首帧时换下一个，均失败返回None
+        """
+        if not re.search(r'GStreamer:\s+YES', cv2.getBuildInformation()):
+            return None
+        
+        for decoder, convert in VIDEO_GST_DECODERS:
+            pipeline = VIDEO_GST_PIPELINE.format(buffer_size=VIDEO_UDP_BUFFER_SIZE,
+                                                 decoder=decoder, convert=convert)
+            capture = cv2.VideoCapture(pipeline, cv2.CAP_GSTREAMER)
+            if not capture.isOpened():
+                capture.release()
+                continue
+            
+            reader = cls(capture)
+            if reader._first_frame.wait(VIDEO_GST_FIRST_FRAME_TIMEOUT):
+                print(f"✓ 使用GStreamer硬件解码: {decoder}")
+                return reader
+            print(f"⚠ GStreamer解码器 {decoder} 未在{VIDEO_GST_FIRST_FRAME_TIMEOUT}秒内输出画面，尝试下一个")
+            # 等读取线程退出并释放管线（占用的UDP端口）后再试下一个
+            reader.stop()
+            reader.worker.join(timeout=1.0)
+        return None
+    
+    def _read_loop(self):
+        while not self.stopped:
+            ok, frame = self.capture.read()
+            if ok:
+                self.frame = frame
+                self._first_frame.set()
+            else:
+                time.sleep(0.005)
+        self.capture.release()
+    
+    def stop(self):
+        self.stopped = True
 
 class TelloController:
+    # 固定实例属性，属性访问不经过实例字典（vision_module 由外部按需挂载）
+    __slots__ = ('tello', 'connected', 'flying', 'video_stream', '_frame_ref', '_frame_scratch',
+                 'emergency_stop', '_fast_handlers', '_diag_cache',
+                 'vision_module')
+    
     def __init__(self):
         self.tello = None
         self.connected = False
         self.flying = False
         self.video_stream = None
+        self._frame_ref = None  # 视频流启动后绑定的帧读取器，get_frame 直接取用
+        self._frame_scratch = None  # get_frame_small 复用的缩小帧缓冲
         self.emergency_stop = False
+        self._diag_cache = (0.0, None)  # 视频流诊断状态快照: (获取时间, 状态)
+        
+        # 无参数指令（takeoff/land/stop）预先绑定好处理函数，整条指令文本直接查表即可执行
+        self._fast_handlers = {
+            name: functools.partial(handler, self, None, spec)
+            for name, (handler, arg_format, _, spec) in self._COMMAND_TABLE.items()
+            if arg_format is None
+        }
         
     def connect(self):
         """连接到Tello无人机"""
         try:
-            self.tello = Tello()
+            self.tello = BufferedVideoTello()
             self.tello.connect()
             
             # 获取无人机信息
@@ -36,123 +150,125 @@ class TelloController:
     def execute_command(self, command):
         """执行无人机命令"""
         if not self.connected:
-            print("无人机未连接")
+            tello_logger.info("无人机未连接")
             return False
         
         if self.emergency_stop:
-            print("紧急停止模式，忽略命令")
+            tello_logger.info("紧急停止模式，忽略命令")
             return False
         
-        try:
-            command_parts = command.split()
-            cmd = command_parts[0].lower()
-            
-            if cmd == "takeoff":
-                if not self.flying:
-                    self.tello.takeoff()
-                    self.flying = True
-                    print("无人机起飞")
-                else:
-                    print("无人机已在飞行中")
-                    
-            elif cmd == "land":
-                if self.flying:
-                    self.tello.land()
-                    self.flying = False
-                    print("无人机降落")
-                else:
-                    print("无人机未在飞行中")
-                    
-            elif cmd == "stop":
-                self.emergency_stop = True
-                if self.flying:
-                    self.tello.emergency()
-                    self.flying = False
-                print("紧急停止！")
-                
-            elif self.flying:  # 只有在飞行中才执行移动命令
-                if cmd == "up" and len(command_parts) == 2:
-                    distance = int(command_parts[1])
-                    distance = max(20, min(500, distance))  # 限制范围
-                    self.tello.move_up(distance)
-                    print(f"向上飞行 {distance}cm")
-                    
-                elif cmd == "down" and len(command_parts) == 2:
-                    distance = int(command_parts[1])
-                    distance = max(20, min(500, distance))
-                    self.tello.move_down(distance)
-                    print(f"向下飞行 {distance}cm")
-                    
-                elif cmd == "left" and len(command_parts) == 2:
-                    distance = int(command_parts[1])
-                    distance = max(20, min(500, distance))
-                    self.tello.move_left(distance)
-                    print(f"向左飞行 {distance}cm")
-                    
-                elif cmd == "right" and len(command_parts) == 2:
-                    distance = int(command_parts[1])
-                    distance = max(20, min(500, distance))
-                    self.tello.move_right(distance)
-                    print(f"向右飞行 {distance}cm")
-                    
-                elif cmd == "forward" and len(command_parts) == 2:
-                    distance = int(command_parts[1])
-                    distance = max(20, min(500, distance))
-                    self.tello.move_forward(distance)
-                    print(f"向前飞行 {distance}cm")
-                    
-                elif cmd == "back" and len(command_parts) == 2:
-                    distance = int(command_parts[1])
-                    distance = max(20, min(500, distance))
-                    self.tello.move_back(distance)
-                    print(f"向后飞行 {distance}cm")
-                    
-                elif cmd == "rotate_cw" and len(command_parts) == 2:
-                    angle = int(command_parts[1])
-                    angle = max(1, min(360, angle))
-                    self.tello.rotate_clockwise(angle)
-                    print(f"顺时针旋转 {angle}度")
-                    
-                elif cmd == "rotate_ccw" and len(command_parts) == 2:
-                    angle = int(command_parts[1])
-                    angle = max(1, min(360, angle))
-                    self.tello.rotate_counter_clockwise(angle)
-                    print(f"逆时针旋转 {angle}度")
-                    
-                elif cmd == "flip" and len(command_parts) == 2:
-                    direction = command_parts[1].lower()
-                    if direction in ['l', 'r', 'f', 'b']:
-                        self.tello.flip(direction)
-                        print(f"翻滚: {direction}")
-                    else:
-                        print("翻滚方向错误")
-                        
-                else:
-                    print(f"未知命令: {command}")
-                    return False
-            else:
-                print("无人机未在飞行中，无法执行移动命令")
+        fast_handler = self._fast_handlers.get(command)
+        if fast_handler is not None:
+            try:
+                fast_handler()
+                return True
+            except Exception as e:
+                tello_logger.error("命令执行错误: %s", e)
+                return False
+        
+        # 一次正则匹配完成指令名与参数的提取，再查表分派
+        match = self._COMMAND_RE.match(command)
+        entry = self._COMMAND_TABLE[match.group(1).lower()] if match else None
+        arg = match.group(2) if match else None
+        if entry is None or entry[2]:
+            # 只有在飞行中才执行移动命令
+            if not self.flying:
+                tello_logger.info("无人机未在飞行中，无法执行移动命令")
                 return False
-                
+            # 参数先经正则校验，处理函数中的int()不会再因输入格式出错
+            if entry is None or arg is None or not entry[1].fullmatch(arg):
+                tello_logger.info("未知命令: %s", command)
+                return False
+        
+        handler, _, _, spec = entry
+        try:
+            handler(self, arg, spec)
             return True
-            
         except Exception as e:
-            print(f"命令执行错误: {e}")
+            tello_logger.error("命令执行错误: %s", e)
             return False
     
+    def _do_takeoff(self, arg, spec):
+        if not self.flying:
+            self.tello.takeoff()
+            self.flying = True
+            tello_logger.info("无人机起飞")
+        else:
+            tello_logger.info("无人机已在飞行中")
+    
+    def _do_land(self, arg, spec):
+        if self.flying:
+            self.tello.land()
+            self.flying = False
+            tello_logger.info("无人机降落")
+        else:
+            tello_logger.info("无人机未在飞行中")
+    
+    def _do_stop(self, arg, spec):
+        self.emergency_stop = True
+        if self.flying:
+            self.tello.emergency()
+            self.flying = False
+        tello_logger.warning("紧急停止！")
+    
+    def _do_move(self, arg, spec):
+        """移动/旋转指令：spec 为 (Tello方法, 最小值, 最大值, 提示文本)"""
+        move, low, high, message = spec
+        value = int(arg)
+        value = low if value < low else (high if value > high else value)  # 限制范围
+        move(self.tello, value)
+        tello_logger.info(message, value)
+    
+    def _do_flip(self, arg, spec):
+        direction = arg.lower()
+        if direction in self._FLIP_DIRECTIONS:
+            self.tello.flip(direction)
+            tello_logger.info("翻滚: %s", direction)
+        else:
+            tello_logger.info("翻滚方向错误")
+    
+    # 参数格式：整数 / 任意单个记号
+    _INT_ARG = re.compile(r'[+-]?\d+')
+    _WORD_ARG = re.compile(r'\S+')
+    
+    # 指令分派表：指令 -> (处理函数, 参数格式, 是否需要飞行中, 附加参数)
+    _COMMAND_TABLE = {
+        "takeoff": (_do_takeoff, None, False, None),
+        "land": (_do_land, None, False, None),
+        "stop": (_do_stop, None, False, None),
+        "up": (_do_move, _INT_ARG, True, (Tello.move_up, 20, 500, "向上飞行 %dcm")),
+        "down": (_do_move, _INT_ARG, True, (Tello.move_down, 20, 500, "向下飞行 %dcm")),
+        "left": (_do_move, _INT_ARG, True, (Tello.move_left, 20, 500, "向左飞行 %dcm")),
+        "right": (_do_move, _INT_ARG, True, (Tello.move_right, 20, 500, "向右飞行 %dcm")),
+        "forward": (_do_move, _INT_ARG, True, (Tello.move_forward, 20, 500, "向前飞行 %dcm")),
+        "back": (_do_move, _INT_ARG, True, (Tello.move_back, 20, 500, "向后飞行 %dcm")),
+        "rotate_cw": (_do_move, _INT_ARG, True, (Tello.rotate_clockwise, 1, 360, "顺时针旋转 %d度")),
+        "rotate_ccw": (_do_move, _INT_ARG, True, (Tello.rotate_counter_clockwise, 1, 360, "逆时针旋转 %d度")),
+        "flip": (_do_flip, _WORD_ARG, True, None),
+    }
+    
+    # 合法的翻滚方向
+    _FLIP_DIRECTIONS = frozenset("lrfb")
+    
+    # "指令 [参数]"：指令名取自分派表，最多一个参数
+    _COMMAND_RE = re.compile(
+        r'^\s*(%s)(?:\s+(\S+))?\s*$' % '|'.join(_COMMAND_TABLE), re.IGNORECASE)
+    
     def get_status(self):
         """获取无人机状态"""
         if not self.connected:
             return "未连接"
         
         try:
-            battery = self.tello.get_battery()
-            height = self.tello.get_height()
-            temp = self.tello.get_temperature()
+            # 直接读取djitellopy状态线程（UDP 8890推送）维护的状态字典，一次取全，无需逐项查询
+            state = self.tello.get_current_state()
+            battery = state['bat']
+            height = state['h']
+            temp = (state['templ'] + state['temph']) / 2
             
             status = f"电池: {battery}% | 高度: {height}cm | 温度: {temp}°C | 飞行状态: {'飞行中' if self.flying else '地面'}"
             return status
-        except:
+        except Exception:
             return "状态获取失败"
     
     def start_video_stream(self):
@@ -162,7 +278,10 @@ class TelloController:
             
         try:
             self.tello.streamon()
-            self.video_stream = self.tello.get_frame_read()
+            self.video_stream = GstFrameReader.open()
+            if self.video_stream is None:
+                self.video_stream = self.tello.get_frame_read()
+            self._frame_ref = self.video_stream
             print("视频流已启动")
             return True
         except Exception as e:
@@ -170,10 +289,28 @@ class TelloController:
             return False
     
     def get_frame(self):
-        """获取视频帧"""
-        if self.video_stream:
-            return self.video_stream.frame
-        return None
+        """获取视频帧（直接返回解码缓冲区的引用，不复制；需要修改时由调用方自行copy）"""
+        frame_ref = self._frame_ref
+        return frame_ref.frame if frame_ref is not None else None
+    
+    def get_frame_small(self):
+        """
+        获取缩小一半的视频帧，结果写入复用的缓冲区，避免每帧分配内存
+        
+        Returns:
+            np.ndarray: 下一次调用时会被覆盖；无视频帧时返回None
+        """
+        frame = self.get_frame()
+        if frame is None:
+            return None
+        
+        height, width = frame.shape[:2]
+        small_shape = (height // 2, width // 2) + frame.shape[2:]
+        if self._frame_scratch is None or self._frame_scratch.shape != small_shape:
+            self._frame_scratch = np.empty(small_shape, dtype=frame.dtype)
+        
+        return cv2.resize(frame, (small_shape[1], small_shape[0]), dst=self._frame_scratch,
+                          interpolation=cv2.INTER_AREA)
     
     def diagnose_video_stream(self):
         """诊断视频流状态"""
@@ -184,8 +321,13 @@ class TelloController:
                 print("❌ 视觉模块未初始化")
                 return False
             
-            # 获取详细状态
-            status = self.vision_module.get_stream_status()
+            # 获取详细状态（短时间内的重复诊断复用上次快照）
+            now = time.monotonic()
+            if now - self._diag_cache[0] < DIAG_CACHE_TTL:
+                status = self._diag_cache[1]
+            else:
+                status = self.vision_module.get_stream_status()
+                self._diag_cache = (now, status)
             
             print(f"📊 视频流状态:")
             print(f"   流状态: {'开启' if status['streaming'] else '关闭'}")
@@ -196,6 +338,7 @@ class TelloController:
             # 如果视频流有问题，尝试重启
             if status['streaming'] and not status['current_frame_valid']:
                 print("⚠ 检测到视频流异常，尝试重启...")
+                self._diag_cache = (0.0, None)
                 return self.vision_module.restart_video_stream()
             
             return status['streaming'] and status['current_frame_valid']
@@ -210,8 +353,10 @@ class TelloController:
             if self.flying:
                 self.tello.land()
             if self.video_stream:
+                if isinstance(self.video_stream, GstFrameReader):
+                    self.video_stream.stop()
                 self.tello.streamoff()
             self.connected = False
             print("Tello连接已断开")
-        except:
+        except Exception:
             pass
\ No newline at end of file
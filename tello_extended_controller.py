@@ -3,13 +3,69 @@
 """
 import time
 import re
-from djitellopy import TelloSwarm
+import functools
+import threading
+from djitellopy import Tello, TelloSwarm
 from config import LED_COLOR_MAP, CHINESE_TO_ENGLISH
 from cruise_module import CruiseModule
 from vision_module import VisionModule
 from linetrack_module import LineTrackModule
 
+# 中文（CJK统一表意文字）字符
+CJK_CHAR_RE = re.compile(r'[\u4e00-\u9fff]')
+# 中英对照表中所有中文词的交替匹配（长词优先），一次扫描完成全部替换
+CHINESE_TO_ENGLISH_RE = re.compile(
+    '|'.join(re.escape(word) for word in sorted(CHINESE_TO_ENGLISH, key=len, reverse=True)))
+
+# 电池电量缓存有效期（秒）
+BATTERY_CACHE_TTL = 2.0
+# 起飞/降落后等待高度稳定的最长时间与轮询间隔（秒）
+FLIGHT_SETTLE_TIMEOUT = 3.0
+FLIGHT_SETTLE_POLL = 0.2
+
+def _clamp_int(value, low, high):
+    """把指令参数解析为整数并限制在[low, high]范围内"""
+    x = int(value)
+    return low if x < low else (high if x > high else x)
+
+@functools.lru_cache(maxsize=128)
+def _resolve_color(color_name):
+    """
+    解析颜色名称为RGB值，按原始名称缓存结果
+    
+    未识别颜色的警告只在首次解析时输出，之后命中缓存不再提示
+    """
+    color_name = color_name.lower().strip()
+    if color_name in LED_COLOR_MAP:
+        return LED_COLOR_MAP[color_name]
+    # 尝试模糊匹配
+    for key in LED_COLOR_MAP:
+        if color_name in key or key in color_name:
+            return LED_COLOR_MAP[key]
+    # 默认返回白色
+    print(f"⚠ 未识别的颜色: {color_name}，使用白色")
+    return (255, 255, 255)
+
 class TelloExtendedController:
+    # 转交给巡线/视觉模块处理的指令
+    _LINETRACK_COMMANDS = frozenset(("start_linetrack", "stop_linetrack", "linetrack_status"))
+    _VISION_COMMANDS = frozenset(("start_video", "stop_video", "capture_image", "recognize_view",
+                                  "start_auto_recognition", "stop_auto_recognition", "vision_status", "show_video"))
+    # 需要先启动视频流的视觉指令
+    _VIDEO_REQUIRED_COMMANDS = frozenset(("capture_image", "recognize_view", "show_video"))
+    
+    # 移动指令表：指令 -> (Tello方法, 最小值, 最大值, 提示文本)
+    _MOVE_TABLE = {
+        "up": (Tello.move_up, 20, 500, "🚁 向上移动 %dcm"),
+        "down": (Tello.move_down, 20, 500, "🚁 向下移动 %dcm"),
+        "left": (Tello.move_left, 20, 500, "🚁 向左移动 %dcm"),
+        "right": (Tello.move_right, 20, 500, "🚁 向右移动 %dcm"),
+        "forward": (Tello.move_forward, 20, 500, "🚁 向前移动 %dcm"),
+        "back": (Tello.move_back, 20, 500, "🚁 向后移动 %dcm"),
+        "rotate_cw": (Tello.rotate_clockwise, 1, 360, "🔄 顺时针旋转 %d度"),
+        "rotate_ccw": (Tello.rotate_counter_clockwise, 1, 360, "🔄 逆时针旋转 %d度"),
+    }
+    
     def __init__(self, tello_ip="192.168.14.180"):
         self.tello_ip = tello_ip
         self.swarm = None
@@ -19,6 +75,10 @@ class TelloExtendedController:
         self.cruise_module = None
         self.vision_module = None
         self.linetrack_module = None
+        self._battery_cache = (0.0, 0)  # (获取时间, 电量)
+        # 起飞/降落过渡期间清除，高度稳定后置位；移动指令在此等待
+        self._flight_settled = threading.Event()
+        self._flight_settled.set()
     
     def connect(self):
         """连接到Tello（编队模式）"""
@@ -107,10 +167,38 @@ class TelloExtendedController:
         """获取电池电量"""
         if not self.connected:
             return 0
+        # 电量变化缓慢，短时间内的重复查询（状态栏刷新、指令前检查）复用上次结果
+        now = time.monotonic()
+        timestamp, battery = self._battery_cache
+        if now - timestamp < BATTERY_CACHE_TTL:
+            return battery
         try:
-            return self.single_tello.get_battery()
+            battery = self.single_tello.get_battery()
         except:
             return 0
+        self._battery_cache = (now, battery)
+        return battery
+    
+    def _begin_flight_settle(self, airborne):
+        """起飞/降落指令发出后在后台轮询高度，稳定后放行后续指令"""
+        self._flight_settled.clear()
+        threading.Thread(target=self._flight_settle_worker, args=(airborne,), daemon=True).start()
+    
+    def _flight_settle_worker(self, airborne):
+        """每隔FLIGHT_SETTLE_POLL读取一次高度，连续两次相同且符合目标状态即视为稳定"""
+        deadline = time.monotonic() + FLIGHT_SETTLE_TIMEOUT
+        last_height = None
+        try:
+            while time.monotonic() < deadline:
+                height = self.single_tello.get_height()
+                if height == last_height and (height > 0) == airborne:
+                    break
+                last_height = height
+                time.sleep(FLIGHT_SETTLE_POLL)
+        except Exception as e:
+            print(f"⚠ 读取高度失败: {e}")
+        finally:
+            self._flight_settled.set()
     
     def get_status(self):
         """获取状态信息（包含巡线状态）"""
@@ -142,17 +230,7 @@ class TelloExtendedController:
     
     def _get_color_rgb(self, color_name):
         """根据颜色名称获取RGB值"""
-        color_name = color_name.lower().strip()
-        if color_name in LED_COLOR_MAP:
-            return LED_COLOR_MAP[color_name]
-        else:
-            # 尝试模糊匹配
-            for key in LED_COLOR_MAP:
-                if color_name in key or key in color_name:
-                    return LED_COLOR_MAP[key]
-            # 默认返回白色
-            print(f"⚠ 未识别的颜色: {color_name}，使用白色")
-            return (255, 255, 255)
+        return _resolve_color(color_name)
 
     def _translate_chinese_to_english(self, text):
         """将中文转换为英文用于点阵屏显示"""
@@ -161,102 +239,106 @@ class TelloExtendedController:
             return CHINESE_TO_ENGLISH[text]
         
         # 检查是否包含中文字符
-        if re.search(r'[\u4e00-\u9fff]', text):
+        if CJK_CHAR_RE.search(text):
             # 包含中文，尝试部分翻译
-            result = text
-            for chinese, english in CHINESE_TO_ENGLISH.items():
-                result = result.replace(chinese, english)
+            result = CHINESE_TO_ENGLISH_RE.sub(lambda m: CHINESE_TO_ENGLISH[m.group(0)], text)
             
             # 如果还有中文字符，提示用户
-            if re.search(r'[\u4e00-\u9fff]', result):
+            if CJK_CHAR_RE.search(result):
                 print(f"⚠ 部分中文无法翻译: {text} -> {result}")
                 # 移除剩余中文字符，只保留英文和数字
-                result = re.sub(r'[\u4e00-\u9fff]', '', result)
+                result = CJK_CHAR_RE.sub('', result)
             
             return result
         else:
             # 纯英文，直接返回
             return text
 
+    def _led_color(self, command_parts):
+        # LED颜色设置：led_color red
+        color_name = command_parts[1]
+        r, g, b = self._get_color_rgb(color_name)
+        self.single_tello.send_expansion_command("led %d %d %d" % (r, g, b))
+        print(f"🔆 LED设置为{color_name}({r},{g},{b})")
+        return True
+    
+    def _led_rgb(self, command_parts):
+        # LED RGB设置：led_rgb 255 0 0
+        try:
+            r = _clamp_int(command_parts[1], 0, 255)
+            g = _clamp_int(command_parts[2], 0, 255)
+            b = _clamp_int(command_parts[3], 0, 255)
+        except ValueError:
+            print("❌ RGB值必须为数字")
+            return False
+        self.single_tello.send_expansion_command("led %d %d %d" % (r, g, b))
+        print(f"🔆 LED设置为RGB({r},{g},{b})")
+        return True
+    
+    def _led_breath(self, command_parts):
+        # LED呼吸灯：led_breath green 1.0
+        color_name = command_parts[1]
+        try:
+            frequency = max(0.1, min(2.5, float(command_parts[2])))
+        except ValueError:
+            print("❌ 频率必须为数字")
+            return False
+        r, g, b = self._get_color_rgb(color_name)
+        self.single_tello.send_expansion_command("led br %s %d %d %d" % (frequency, r, g, b))
+        print(f"🔆 LED呼吸灯: {color_name}({r},{g},{b}) 频率{frequency}Hz")
+        return True
+    
+    def _led_blink(self, command_parts):
+        # LED交替闪烁：led_blink red blue 1.0
+        color1_name = command_parts[1]
+        color2_name = command_parts[2]
+        try:
+            frequency = max(0.1, min(10.0, float(command_parts[3])))
+        except ValueError:
+            print("❌ 频率必须为数字")
+            return False
+        r1, g1, b1 = self._get_color_rgb(color1_name)
+        r2, g2, b2 = self._get_color_rgb(color2_name)
+        self.single_tello.send_expansion_command(
+            "led bl %s %d %d %d %d %d %d" % (frequency, r1, g1, b1, r2, g2, b2))
+        print(f"🔆 LED交替闪烁: {color1_name}-{color2_name} 频率{frequency}Hz")
+        return True
+    
+    def _display_text(self, command_parts):
+        # 点阵屏显示文本：display_text Hello World
+        text = " ".join(command_parts[1:])
+        # 限制长度
+        if len(text) > 70:
+            text = text[:70]
+            print(f"⚠ 文本过长，已截断为: {text}")
+        
+        # 中文转英文
+        english_text = self._translate_chinese_to_english(text)
+        
+        # 发送点阵屏滚动显示命令（蓝色，向左滚动，1Hz）
+        mled_cmd = f"mled l r 1 {english_text}"
+        self.single_tello.send_expansion_command(mled_cmd)
+        print(f"📺 点阵屏显示: '{text}' -> '{english_text}'")
+        return True
+    
+    # LED指令表：指令 -> (处理函数, 最少词数)
+    _LED_TABLE = {
+        "led_color": (_led_color, 2),
+        "led_rgb": (_led_rgb, 4),
+        "led_breath": (_led_breath, 3),
+        "led_blink": (_led_blink, 4),
+        "display_text": (_display_text, 2),
+    }
+
     def execute_led_command(self, command):
         """执行LED扩展指令"""
         try:
             command_parts = command.split()
-            cmd = command_parts[0].lower()
-            
-            if cmd == "led_color" and len(command_parts) >= 2:
-                # LED颜色设置：led_color red
-                color_name = command_parts[1]
-                r, g, b = self._get_color_rgb(color_name)
-                led_cmd = f"led {r} {g} {b}"
-                self.single_tello.send_expansion_command(led_cmd)
-                print(f"🔆 LED设置为{color_name}({r},{g},{b})")
-                return True
-                
-            elif cmd == "led_rgb" and len(command_parts) >= 4:
-                # LED RGB设置：led_rgb 255 0 0
-                try:
-                    r = max(0, min(255, int(command_parts[1])))
-                    g = max(0, min(255, int(command_parts[2])))
-                    b = max(0, min(255, int(command_parts[3])))
-                    led_cmd = f"led {r} {g} {b}"
-                    self.single_tello.send_expansion_command(led_cmd)
-                    print(f"🔆 LED设置为RGB({r},{g},{b})")
-                    return True
-                except ValueError:
-                    print("❌ RGB值必须为数字")
-                    return False
-                    
-            elif cmd == "led_breath" and len(command_parts) >= 3:
-                # LED呼吸灯：led_breath green 1.0
-                color_name = command_parts[1]
-                try:
-                    frequency = max(0.1, min(2.5, float(command_parts[2])))
-                    r, g, b = self._get_color_rgb(color_name)
-                    led_cmd = f"led br {frequency} {r} {g} {b}"
-                    self.single_tello.send_expansion_command(led_cmd)
-                    print(f"🔆 LED呼吸灯: {color_name}({r},{g},{b}) 频率{frequency}Hz")
-                    return True
-                except ValueError:
-                    print("❌ 频率必须为数字")
-                    return False
-                    
-            elif cmd == "led_blink" and len(command_parts) >= 4:
-                # LED交替闪烁：led_blink red blue 1.0
-                color1_name = command_parts[1]
-                color2_name = command_parts[2]
-                try:
-                    frequency = max(0.1, min(10.0, float(command_parts[3])))
-                    r1, g1, b1 = self._get_color_rgb(color1_name)
-                    r2, g2, b2 = self._get_color_rgb(color2_name)
-                    led_cmd = f"led bl {frequency} {r1} {g1} {b1} {r2} {g2} {b2}"
-                    self.single_tello.send_expansion_command(led_cmd)
-                    print(f"🔆 LED交替闪烁: {color1_name}-{color2_name} 频率{frequency}Hz")
-                    return True
-                except ValueError:
-                    print("❌ 频率必须为数字")
-                    return False
-                    
-            elif cmd == "display_text" and len(command_parts) >= 2:
-                # 点阵屏显示文本：display_text Hello World
-                text = " ".join(command_parts[1:])
-                # 限制长度
-                if len(text) > 70:
-                    text = text[:70]
-                    print(f"⚠ 文本过长，已截断为: {text}")
-                
-                # 中文转英文
-                english_text = self._translate_chinese_to_english(text)
-                
-                # 发送点阵屏滚动显示命令（蓝色，向左滚动，1Hz）
-                mled_cmd = f"mled l r 1 {english_text}"
-                self.single_tello.send_expansion_command(mled_cmd)
-                print(f"📺 点阵屏显示: '{text}' -> '{english_text}'")
-                return True
-            
-            else:
+            entry = self._LED_TABLE.get(command_parts[0].lower())
+            if entry is None or len(command_parts) < entry[1]:
                 print(f"❌ 未知LED指令: {command}")
                 return False
+            return entry[0](self, command_parts)
                 
         except Exception as e:
             print(f"❌ LED指令执行失败: {e}")
@@ -355,19 +437,19 @@ class TelloExtendedController:
             print(f"❌ 巡线指令执行失败: {e}")
             return False
 
-    def execute_vision_command(self, command):
-        """执行视觉感知相关指令"""
+    def execute_vision_command(self, command, command_parts=None):
+        """执行视觉感知相关指令，调用方已拆分过指令时可直接传入command_parts"""
         try:
             if not self.vision_module:
                 print("⚠ 视觉感知模块未初始化")
                 return False
             
-            command_parts = command.split()
+            if command_parts is None:
+                command_parts = command.split()
             cmd = command_parts[0].lower()
             
             # 对于需要视频流的指令，先确保视频流已启动
-            video_required_commands = ["capture_image", "recognize_view", "show_video"]
-            if cmd in video_required_commands and not self.vision_module.video_streaming:
+            if cmd in self._VIDEO_REQUIRED_COMMANDS and not self.vision_module.video_streaming:
                 print("📹 自动启动视频流...")
                 if not self.vision_module.start_video_stream():
                     print("❌ 无法启动视频流，视觉指令执行失败")
@@ -470,31 +552,32 @@ class TelloExtendedController:
             return False
         
         try:
+            command_parts = command.split()
+            cmd = command_parts[0].lower()
+            
             # 检查是否为巡线指令
-            if command.startswith(("start_linetrack", "stop_linetrack", "linetrack_status")):
-                return self.execute_linetrack_command(command)
+            # 巡线指令无参数，直接传入已转小写的指令词
+            if cmd in self._LINETRACK_COMMANDS:
+                return self.execute_linetrack_command(cmd)
             
-            # 检查是否为视觉指令
-            if command.startswith(("start_video", "stop_video", "capture_image", "recognize_view", 
-                                 "start_auto_recognition", "stop_auto_recognition", "vision_status", "show_video")):
-                return self.execute_vision_command(command)
+            # 检查是否为视觉指令（复用已拆分的参数）
+            if cmd in self._VISION_COMMANDS:
+                return self.execute_vision_command(command, command_parts)
             
             # 先检查电池状态
             battery = self.get_battery()
             print(f"当前电池: {battery}%")
             
-            command_parts = command.split()
-            cmd = command_parts[0].lower()
-            
             print(f"🚁 执行指令: {command}")
             
             if cmd == "takeoff":
                 if not self.flying:
                     try:
+                        self._flight_settled.wait(FLIGHT_SETTLE_TIMEOUT)
                         self.single_tello.takeoff()
-                        print("等待起飞完成...")
-                        time.sleep(3)  # 等待起飞完成
                         self.flying = True
+                        # 后台等待高度稳定，移动指令会在稳定后再执行
+                        self._begin_flight_settle(airborne=True)
                         print("✓ 无人机起飞成功")
                         return True
                     except Exception as e:
@@ -513,9 +596,11 @@ class TelloExtendedController:
                         if self.linetrack_module:
                             self.linetrack_module.stop_line_tracking()
                         
+                        self._flight_settled.wait(FLIGHT_SETTLE_TIMEOUT)
                         self.single_tello.land()
-                        time.sleep(3)  # 等待降落完成
                         self.flying = False
+                        # 后台等待落地，再次起飞前会等待落地完成
+                        self._begin_flight_settle(airborne=False)
                         print("✓ 无人机降落成功")
                         return True
                     except Exception as e:
@@ -524,8 +609,8 @@ class TelloExtendedController:
                         try:
                             print("尝试紧急停止...")
                             self.single_tello.emergency()
-                            time.sleep(2)
                             self.flying = False
+                            self._begin_flight_settle(airborne=False)
                             if self.cruise_module:
                                 self.cruise_module.stop_cruise()
                             if self.linetrack_module:
@@ -558,54 +643,16 @@ class TelloExtendedController:
             elif self.flying:  # 只有在飞行中才执行移动命令
                 try:
                     result = False
-                    if cmd == "up" and len(command_parts) == 2:
-                        distance = max(20, min(500, int(command_parts[1])))
-                        print(f"🚁 向上移动 {distance}cm")
-                        self.single_tello.move_up(distance)
+                    # 查表取得移动方法，避免逐个比较指令字符串
+                    move = self._MOVE_TABLE.get(cmd)
+                    if move is not None and len(command_parts) == 2:
+                        move_fn, low, high, message = move
+                        value = _clamp_int(command_parts[1], low, high)
+                        # 刚起飞时等待高度稳定
+                        self._flight_settled.wait(FLIGHT_SETTLE_TIMEOUT)
+                        print(message % value)
+                        move_fn(self.single_tello, value)
                         result = True
-                        
-                    elif cmd == "down" and len(command_parts) == 2:
-                        distance = max(20, min(500, int(command_parts[1])))
-                        print(f"🚁 向下移动 {distance}cm")
-                        self.single_tello.move_down(distance)
-                        result = True
-                        
-                    elif cmd == "left" and len(command_parts) == 2:
-                        distance = max(20, min(500, int(command_parts[1])))
-                        print(f"🚁 向左移动 {distance}cm")
-                        self.single_tello.move_left(distance)
-                        result = True
-                        
-                    elif cmd == "right" and len(command_parts) == 2:
-                        distance = max(20, min(500, int(command_parts[1])))
-                        print(f"🚁 向右移动 {distance}cm")
-                        self.single_tello.move_right(distance)
-                        result = True
-                        
-                    elif cmd == "forward" and len(command_parts) == 2:
-                        distance = max(20, min(500, int(command_parts[1])))
-                        print(f"🚁 向前移动 {distance}cm")
-                        self.single_tello.move_forward(distance)
-                        result = True
-                        
-                    elif cmd == "back" and len(command_parts) == 2:
-                        distance = max(20, min(500, int(command_parts[1])))
-                        print(f"🚁 向后移动 {distance}cm")
-                        self.single_tello.move_back(distance)
-                        result = True
-                        
-                    elif cmd == "rotate_cw" and len(command_parts) == 2:
-                        angle = max(1, min(360, int(command_parts[1])))
-                        print(f"🔄 顺时针旋转 {angle}度")
-                        self.single_tello.rotate_clockwise(angle)
-                        result = True
-                        
-                    elif cmd == "rotate_ccw" and len(command_parts) == 2:
-                        angle = max(1, min(360, int(command_parts[1])))
-                        print(f"🔄 逆时针旋转 {angle}度")
-                        self.single_tello.rotate_counter_clockwise(angle)
-                        result = True
-                        
                     else:
                         print(f"✗ 未知命令: {command}")
                         result = False
@@ -638,10 +685,9 @@ class TelloExtendedController:
             if self.linetrack_module:
                 self.linetrack_module.stop_line_tracking()
             
-            # 停止所有RC控制
+            # 停止所有RC控制（UDP单向发送，无需等待应答）
             if self.flying and self.connected:
                 self.single_tello.send_rc_control(0, 0, 0, 0)
-                time.sleep(0.5)
                 
         except Exception as e:
             print(f"⚠ 紧急停止RC控制时出错: {e}")
@@ -5,6 +5,7 @@ import cv2
 import os
 import time
 import threading
+import concurrent.futures
 from datetime import datetime
 from baidu_vision import BaiduVision
 from llm_client import LLMClient
@@ -35,6 +36,9 @@ class VisionModule:
         
         # 智能描述相关
         self.auto_description_enabled = VISION_AUTO_DESCRIPTION
+        # 描述生成（LLM请求+播报）在后台单线程执行：不阻塞后续飞行指令，多次描述按顺序播报
+        self._description_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="vision-desc")
         
         # 创建图片保存文件夹
         self._ensure_capture_folder()
@@ -470,8 +474,8 @@ class VisionModule:
                 # 生成智能描述并播报
                 should_describe = auto_describe if auto_describe is not None else self.auto_description_enabled
                 if should_describe:
-                    print("🗣 开始生成智能描述...")
-                    self._generate_and_speak_description(result)
+                    print("🗣 开始生成智能描述（后台）...")
+                    self._description_executor.submit(self._generate_and_speak_description, result)
                 
                 # 清理临时文件
                 if not save_image and image_path and os.path.exists(image_path):
@@ -807,6 +811,9 @@ class VisionModule:
             # 停止视频流
             self.stop_video_stream()
             
+            # 停止后台描述生成（不等待进行中的LLM请求）
+            self._description_executor.shutdown(wait=False)
+            
             # 关闭语音合成
             self.speech_synthesis.shutdown()
             
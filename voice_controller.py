@@ -206,41 +206,22 @@ class VoiceController:
                 
                 # 使用LLM解析命令
                 print(f"🤖 发送到LLM解析: {voice_text}")
-                commands = self.llm_client.parse_voice_command(voice_text)
+                # 整句作为一个批次入队，保证stop/land与同句其他指令一起处理
+                commands = [command for command in self.llm_client.parse_voice_command(voice_text)
+                            if command and command != "unknown"]
+                if commands:
+                    self.command_queue.put(commands)
+                    print(f"📥 指令已加入队列: {commands}")
                 
-                if isinstance(commands, list):
-                    if len(commands) > 1:
-                        print(f"🎯 LLM解析出复合指令: {voice_text} -> {commands}")
-                        valid_commands = [cmd for cmd in commands if cmd != "unknown"]
-                        if valid_commands:
-                            if len(valid_commands) > 1:
-                                self.speak(f"收到复合指令，共{len(valid_commands)}条")
-                            else:
-                                self.speak(f"收到指令: {valid_commands[0]}")
-                            self.command_queue.put(valid_commands)
-                            print(f"📥 复合指令已加入队列: {valid_commands}")
-                        else:
-                            print("❌ 所有指令都无法解析")
-                            self.speak("抱歉，无法识别该指令")
-                    else:
-                        command = commands[0] if commands else "unknown"
-                        print(f"🎯 LLM解析结果: {voice_text} -> {command}")
-                        if command and command != "unknown":
-                            self.speak(f"收到指令: {command}")
-                            self.command_queue.put([command])
-                            print(f"📥 指令已加入队列: {command}")
-                        else:
-                            print("❌ 无法解析的指令")
-                            self.speak("抱歉，无法识别该指令")
+                if len(commands) > 1:
+                    print(f"🎯 LLM解析出复合指令: {voice_text} -> {commands}")
+                    self.speak(f"收到复合指令，共{len(commands)}条")
+                elif commands:
+                    print(f"🎯 LLM解析结果: {voice_text} -> {commands[0]}")
+                    self.speak(f"收到指令: {commands[0]}")
                 else:
-                    # 兼容旧格式
-                    if commands and commands != "unknown":
-                        self.speak(f"收到指令: {commands}")
-                        self.command_queue.put([commands])
-                        print(f"📥 指令已加入队列: {commands}")
-                    else:
-                        print("❌ 无法解析的指令")
-                        self.speak("抱歉，无法识别该指令")
+                    print("❌ 无法解析的指令")
+                    self.speak("抱歉，无法识别该指令")
             else:
                 print("🔇 未识别到清晰语音")
                 self.speak("未识别到清晰语音")